@@ -0,0 +1,188 @@
+"""
+Headless batch backtest over a whole exchange list.
+
+Backtests one strategy on every symbol of resource/SGX.csv or
+resource/NYSE.csv in a pool of worker processes and writes one row of
+metrics per symbol to a parquet file. Finished batches are checkpointed,
+so an interrupted run picks up where it stopped when started again with
+the same arguments.
+
+Usage:
+    python batch_backtest.py --exchange SGX --strategy MACD --period 5y
+    python batch_backtest.py --exchange NYSE --strategy "Moving Average Crossover" \\
+        --param sma_period=50 --param ema_period=20 --workers 4
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from pathlib import Path
+import pandas as pd
+from utils_panel import STRATEGIES, REQUIRED_PARAMS, PanelBacktest, check_params, run_cached_backtests
+from utils_scheduler import FetchScheduler, set_scheduler, REQUESTS_PER_SECOND, BURST, MAX_CONCURRENCY
+
+
+RESOURCE_ROOT = Path("./resource")
+OUTPUT_ROOT = Path("./batch_results")
+
+BATCH_SIZE = 25
+WORKERS = os.cpu_count() or 1
+
+# Prefix of the utils_metrics risk metric columns: some of their names (e.g.
+# 'Total Return') are also panel metrics, computed another way
+RISK_PREFIX = "Risk "
+
+
+def load_universe(exchange):
+    """
+    Symbols and names of an exchange list (the two CSVs order their columns differently).
+    """
+    stocks = pd.read_csv(RESOURCE_ROOT / f"{exchange}.csv")
+    stocks = stocks.dropna(subset=["Symbol"]).drop_duplicates("Symbol")
+    return dict(zip(stocks["Symbol"].astype(str), stocks["Name"].astype(str)))
+
+
+def _init_worker(workers):
+    # the workers share Yahoo's rate limit, give each its slice of it
+    set_scheduler(FetchScheduler(rate=REQUESTS_PER_SECOND / workers,
+                                 burst=max(1, BURST // workers),
+                                 max_workers=max(1, MAX_CONCURRENCY // workers)))
+
+
+def run_batch(job):
+    """
+    Backtest one batch of symbols and return one row per symbol.
+    """
+    batch, symbols, names, exchange, period, strategy, params = job
+    try:
+        results, errors = run_cached_backtests(symbols, period, strategy, params)
+    except Exception as e:
+        results, errors = {}, {symbol: f"Batch failed: {e}" for symbol in symbols}
+
+    rows = []
+    for symbol in symbols:
+        row = {"Symbol": symbol, "Name": names.get(symbol), "Exchange": exchange}
+        if symbol in results:
+            hist = results[symbol]["hist"]
+            row.update({
+                "Bars": len(hist),
+                "Start": hist.index[0].tz_localize(None) if hist.index.tz is not None else hist.index[0],
+                "End": hist.index[-1].tz_localize(None) if hist.index.tz is not None else hist.index[-1],
+            })
+            row.update({PanelBacktest.METRIC_COLUMNS[name]: value for name, value in results[symbol]["metrics"].items()})
+            row.update({RISK_PREFIX + name: value for name, value in results[symbol]["report"]["metrics"].items()})
+            row["Error"] = None
+        else:
+            row["Error"] = errors.get(symbol, "No result")
+        rows.append(row)
+    return batch, rows
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-").lower()
+
+
+def _save_part(path, rows):
+    # atomic write so a part file on disk is always a finished batch
+    tmp_path = path.with_suffix(".tmp")
+    pd.DataFrame(rows).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def run(exchange, strategy, period, params, out_dir, workers=WORKERS, batch_size=BATCH_SIZE,
+        limit=None, fresh=False):
+    """
+    Run (or resume) a batch backtest and write out_dir/results.parquet.
+
+    Returns:
+    - DataFrame of the results, one row per symbol.
+    """
+    check_params(strategy, params)
+    params = {name: params[name] for name in REQUIRED_PARAMS[strategy]}
+    universe = load_universe(exchange)
+    symbols = list(universe)[:limit] if limit else list(universe)
+
+    out_dir = Path(out_dir)
+    parts_dir = out_dir / "parts"
+    config = {"exchange": exchange, "strategy": strategy, "period": period, "params": params,
+              "symbols": len(symbols), "batch_size": batch_size}
+    config_path = out_dir / "run.json"
+
+    if config_path.exists() and not fresh:
+        saved = json.loads(config_path.read_text())
+        if saved != config:
+            raise SystemExit(f"{out_dir} holds a run with other settings, use --fresh or another --out.")
+    elif fresh and parts_dir.exists():
+        for part in parts_dir.glob("*.parquet"):
+            part.unlink()
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    config_path.write_text(json.dumps(config, indent=2))
+
+    batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+
+    def part_path(batch):
+        return parts_dir / f"batch-{batch:05d}.parquet"
+
+    jobs = [(i, batch, {s: universe[s] for s in batch}, exchange, period, strategy, params)
+            for i, batch in enumerate(batches) if not part_path(i).exists()]
+    print(f"{exchange}: {len(symbols)} symbols in {len(batches)} batches, "
+          f"{len(batches) - len(jobs)} already done, {len(jobs)} to run on {workers} workers")
+
+    started = time.monotonic()
+    done = len(batches) - len(jobs)
+    if jobs:
+        # spawn: workers start clean instead of inheriting the parent's threads and locks
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+            for batch, rows in pool.imap_unordered(run_batch, jobs):
+                _save_part(part_path(batch), rows)
+                done += 1
+                failed = sum(row["Error"] is not None for row in rows)
+                print(f"[{done}/{len(batches)}] batch {batch} done: {len(rows)} symbols, {failed} errors, "
+                      f"{time.monotonic() - started:.0f}s elapsed")
+
+    results = pd.concat([pd.read_parquet(part_path(i)) for i in range(len(batches))], ignore_index=True)
+    if "Total Return" in results.columns:
+        results = results.sort_values("Total Return", ascending=False, na_position="last", kind="stable")
+    results.to_parquet(out_dir / "results.parquet", index=False)
+    print(f"Wrote {len(results)} rows to {out_dir / 'results.parquet'}")
+    return results
+
+
+def _parse_param(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"expected name=value, got {text!r}")
+    return name.strip(), float(value) if "." in value else int(value)
+
+
+def main(argv=None):
+    from utils_backtest import strategy_params
+
+    parser = argparse.ArgumentParser(description="Backtest a strategy across an exchange list.")
+    parser.add_argument("--exchange", choices=["SGX", "NYSE"], required=True)
+    parser.add_argument("--strategy", choices=STRATEGIES, default=STRATEGIES[0])
+    parser.add_argument("--period", default="5y", help="yfinance style period, e.g. 1y, 5y, max")
+    parser.add_argument("--param", action="append", type=_parse_param, default=[],
+                        help="strategy parameter override as name=value, e.g. sma_period=50")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--limit", type=int, help="only the first N symbols of the list")
+    parser.add_argument("--out", help="output folder (default: batch_results/<exchange>-<strategy>-<period>)")
+    parser.add_argument("--fresh", action="store_true", help="ignore a checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    # sidebar defaults of the strategy, overridden by --param
+    params = {name: spec["value"] for name, spec in strategy_params[args.strategy].items() if name != "period_select"}
+    params.update(dict(args.param))
+    out_dir = args.out or OUTPUT_ROOT / f"{args.exchange.lower()}-{_slug(args.strategy)}-{args.period}"
+
+    run(args.exchange, args.strategy, args.period, params, out_dir, args.workers, args.batch_size,
+        args.limit, args.fresh)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
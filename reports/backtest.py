@@ -1,14 +1,19 @@
 import streamlit as st
 import pandas as pd
-from utils_backtest import fetch_financial_ratios, backtest_strategy, plot_backtest_results, strategy_params, fetch_dividends, plot_dividends, fetch_stock_data, plot_strategy, trading_strategy
+from utils_backtest import fetch_financial_ratios, format_performance_metrics, plot_backtest_results, strategy_params, fetch_dividends, plot_dividends, plot_strategy, trading_strategy, plot_sweep_heatmap, plot_walk_forward, plot_portfolio_equity, plot_monte_carlo, run_monte_carlo
+from utils_panel import run_cached_backtests
+from utils_basket import ALLOCATIONS, MAX_POSITION, basket_backtest
+from utils_montecarlo import N_PATHS, BLOCK_SIZE, SEED
+from utils_sweep import SWEEP_AXES, SWEEP_DEFAULTS, parameter_values, run_sweep
+from utils_walkforward import TRAIN_BARS, TEST_BARS, run_walk_forward, summarize_folds
 import streamlit as st
 from huggingface_hub import InferenceClient
 from utils_markdown import display_md
-from utils_banner import breakingnews, news
+from utils_banner import news_banner
 import streamlit_antd_components as sac
 from utils_llm import initialize_inferenceclient, model_option
 
-breakingnews(news, '', 'filled') 
+news_banner()
 
 #--- main layout ---#
 col_trade, col_bot = st.columns([0.7, 0.3])
@@ -173,25 +178,115 @@ if len(tickers):
                 ":blue[RSI Period (days)]", **params["rsi_period"])
             strategy_params[strategy].update({"period_select": {"RSI Period (days):" : rsi_period}})
 
+        # portfolio backtest: one shared cash balance across the selected tickers
+        basket = sidebar_widget.toggle(":blue[Portfolio Backtest]", value=False, disabled=len(tickers) < 2)
+        if basket:
+            allocation = sidebar_widget.selectbox(":blue[Allocation]", ALLOCATIONS, index=0)
+            max_position = sidebar_widget.slider(":blue[Max Position]", min_value=0.05, max_value=1.0,
+                                                 value=MAX_POSITION, step=0.05,
+                                                 disabled=allocation != "Max Position Cap")
+
+        # monte carlo: block bootstrap of the strategy and benchmark returns
+        robustness = sidebar_widget.toggle(":blue[Monte Carlo]", value=False)
+        if robustness:
+            col_paths, col_block, col_seed = sidebar_widget.columns(3)
+            n_paths = col_paths.number_input("Paths", min_value=100, max_value=50000, value=N_PATHS, step=1000)
+            block_size = col_block.number_input("Block (days)", min_value=1, value=BLOCK_SIZE)
+            seed = col_seed.number_input("Seed", min_value=0, value=SEED)
+
+        # parameter sweep: ranges of the two main parameters of the strategy
+        sweep = sidebar_widget.toggle(":blue[Parameter Sweep]", value=False)
+        # walk-forward: optimize over the same ranges on train windows, score on the next test window
+        walk_forward = sidebar_widget.toggle(":blue[Walk-Forward]", value=False)
+        sweep_grid = {}
+
+        if walk_forward:
+            col_train, col_test = sidebar_widget.columns(2)
+            train_bars = col_train.number_input("Train bars", min_value=20, value=TRAIN_BARS)
+            test_bars = col_test.number_input("Test bars", min_value=5, value=TEST_BARS)
+            anchored = sidebar_widget.checkbox("Anchored (expanding) train window", value=False)
+
+        if sweep or walk_forward:
+            with sidebar_widget.expander("Sweep ranges", expanded=True):
+                for name in filter(None, SWEEP_AXES[strategy]):
+                    start, stop, step = SWEEP_DEFAULTS[name]
+                    st.caption(f"**{name}** (start, stop, step)")
+                    col_start, col_stop, col_step = st.columns(3)
+                    start = col_start.number_input("start", value=start, min_value=params[name]["min_value"], key=f"{name}_start", label_visibility="collapsed")
+                    stop = col_stop.number_input("stop", value=stop, min_value=params[name]["min_value"], key=f"{name}_stop", label_visibility="collapsed")
+                    step = col_step.number_input("step", value=step, min_value=params[name]["min_value"], key=f"{name}_step", label_visibility="collapsed")
+                    try:
+                        sweep_grid[name] = parameter_values(start, stop, step)
+                    except ValueError as e:
+                        st.error(str(e))
+                        sweep = walk_forward = False
+
 
         with col_trade:
 
             # with st.container(height=700):
 
+            # backtest every selected ticker in one vectorized pass, results
+            # already computed on the same bars come from the result cache
+            backtest_params = {"sma_period": sma_period, "ema_period": ema_period,
+                      "bb_period": bb_period, "bb_std": bb_std,
+                      "macd_fast": macd_fast, "macd_slow": macd_slow, "macd_signal": macd_signal,
+                      "rsi_period": rsi_period}
+            try:
+                results, errors = run_cached_backtests(tickers, period, strategy, backtest_params)
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+
+            if basket and results:
+                # combined result of the selected tickers
+                portfolio = basket_backtest({t: results[t]["hist"] for t in tickers if t in results},
+                                            allocation, max_position)
+                st.subheader(f"Portfolio ({allocation})")
+                col_total, col_bench, col_dd, col_sharpe = st.columns(4)
+                col_total.metric("Total Return", f"{portfolio['metrics']['Total Return']:.2%}")
+                col_bench.metric("Benchmark Return", f"{portfolio['metrics']['Benchmark Return']:.2%}")
+                col_dd.metric("Max Drawdown", f"{portfolio['metrics']['Max Drawdown']:.2%}")
+                col_sharpe.metric("Sharpe Ratio", f"{portfolio['metrics']['Sharpe Ratio']:.2f}")
+                plot_portfolio_equity(portfolio["equity"], f"Portfolio - {strategy} - Cumulative Returns")
+                col_metrics, col_contribution = st.columns(2)
+                col_metrics.dataframe(pd.Series(portfolio["metrics"], name="Value").rename_axis("Metric"),
+                                      use_container_width=True)
+                col_contribution.dataframe(portfolio["contribution"], use_container_width=True)
+                st.session_state.msg_history.append(
+                    {"role": "system", "content": f"Here are the portfolio backtest results {portfolio['metrics']} with {allocation} allocation across {list(results)}"})
+
+            if sweep:
+                with st.spinner("Sweeping parameters..."):
+                    sweep_results, sweep_errors = run_sweep(tickers, period, strategy, sweep_grid, backtest_params)
+
+            if walk_forward:
+                with st.spinner("Running walk-forward folds..."):
+                    wf_folds, wf_errors = run_walk_forward(tickers, period, strategy, sweep_grid, backtest_params,
+                                                           train_bars, test_bars, anchored)
+                    wf_summary = summarize_folds(wf_folds)
+
             #for ticker in st.session_state.tickers:
             for ticker in tickers:
 
-                # fetch stock data, backtest, financial ratios, dividends
-                hist, strategy = fetch_stock_data(ticker, period, sma_period, ema_period, bb_period,
-                                                  bb_std, macd_fast, macd_slow, macd_signal, rsi_period, strategy)
-                hist, metrics = backtest_strategy(hist, strategy)
+                if ticker in errors:
+                    st.error(errors[ticker])
+                    continue
+
+                # backtest results, financial ratios, dividends
+                hist = results[ticker]["hist"]
+                metrics = format_performance_metrics(strategy, **results[ticker]["metrics"])
+                report = results[ticker]["report"]
                 ratios = fetch_financial_ratios(ticker)
                 dividends_df = fetch_dividends(ticker)
 
                 st.subheader(stock_options[ticker])
 
-                tab_1, tab_2, tab_3 = st.tabs(
-                    [":blue-background[Buy/Sell Signals]", ":blue-background[Backtest Returns]", ":blue-background[Dividend Returns]"])
+                tab_1, tab_2, tab_3, *tab_extra = st.tabs(
+                    [":blue-background[Buy/Sell Signals]", ":blue-background[Backtest Returns]", ":blue-background[Dividend Returns]"]
+                    + ([":blue-background[Parameter Sweep]"] if sweep else [])
+                    + ([":blue-background[Walk-Forward]"] if walk_forward else [])
+                    + ([":blue-background[Monte Carlo]"] if robustness else []))
 
                 # backtest text in col1, financial ratios in col2
                 col1, col2 = st.columns([0.6, 0.4], gap="large")
@@ -211,17 +306,69 @@ if len(tickers):
                                   bb_period, bb_std)
 
                 with tab_2:
-                    # plot backtest
+                    # plot backtest, risk metrics and trade ledger
                     plot_backtest_results(hist, ticker)
+                    col_risk, col_ledger = st.columns([0.35, 0.65])
+                    col_risk.dataframe(pd.Series(report["metrics"], name="Value").rename_axis("Metric"),
+                                       use_container_width=True)
+                    col_ledger.dataframe(report["trades"], hide_index=True, use_container_width=True)
 
                 with tab_3:
                     # plot dividends
                     plot_dividends(dividends_df, ticker)
 
+                if sweep:
+                    with tab_extra[0]:
+                        # ranked parameter combinations and heatmaps
+                        if ticker in sweep_errors:
+                            st.error(sweep_errors[ticker])
+                        else:
+                            ranked = sweep_results[sweep_results["Ticker"] == ticker].drop(columns="Ticker")
+                            plot_sweep_heatmap(ranked, ticker, *SWEEP_AXES[strategy])
+                            st.dataframe(ranked, hide_index=True, height=300, use_container_width=True)
+                            st.session_state.msg_history.append(
+                                {"role": "system", "content": f"Here are the best parameter combinations {ranked.head(5).to_dict('records')} of the {strategy} sweep for {ticker}"})
+
+                if walk_forward:
+                    with tab_extra[sweep]:
+                        # out-of-sample results per fold
+                        if ticker in wf_errors:
+                            st.error(wf_errors[ticker])
+                        elif ticker in wf_summary.index:
+                            summary = wf_summary.loc[ticker]
+                            col_a, col_b, col_c = st.columns(3)
+                            col_a.metric("Compounded Test Return", f"{summary['Compounded Test Return']:.2%}",
+                                         f"{summary['Compounded Test Return'] - summary['Compounded Benchmark Return']:.2%} vs benchmark")
+                            col_b.metric("Profitable Folds", f"{summary['Profitable Folds']:.0%}")
+                            col_c.metric("Folds", int(summary['Folds']))
+                            ticker_folds = wf_folds[wf_folds["Ticker"] == ticker].drop(columns="Ticker")
+                            plot_walk_forward(ticker_folds, ticker)
+                            st.dataframe(ticker_folds, hide_index=True, use_container_width=True)
+                            st.session_state.msg_history.append(
+                                {"role": "system", "content": f"Here are the walk-forward results {summary.to_dict()} of the {strategy} strategy for {ticker}"})
+
+                if robustness:
+                    with tab_extra[-1]:
+                        # distribution of outcomes over resampled histories
+                        try:
+                            simulation = run_monte_carlo(hist, n_paths, block_size, seed)
+                        except ValueError as e:
+                            st.error(str(e))
+                        else:
+                            col_loss, col_beat = st.columns(2)
+                            col_loss.metric("Probability of Loss", f"{simulation['odds']['Probability of Loss']:.0%}")
+                            col_beat.metric("Probability of Beating Benchmark", f"{simulation['odds']['Probability of Beating Benchmark']:.0%}")
+                            plot_monte_carlo(simulation["paths"], ticker)
+                            st.dataframe(simulation["summary"], use_container_width=True)
+                            st.session_state.msg_history.append(
+                                {"role": "system", "content": f"Here are the Monte Carlo percentiles {simulation['summary'].to_dict()} and odds {simulation['odds']} of the {strategy} strategy for {ticker}"})
+
                 st.session_state.msg_history.append(
                     {"role": "system", "content": f"Here are the backtesting results {metrics} for {ticker} and the selected parameters: period = {period}, parameters = {strategy_params[strategy]['period_select']}"})
                 st.session_state.msg_history.append(
                     {"role": "system", "content": f"Here are the financial ratios {ratios} for {ticker}"})
+                st.session_state.msg_history.append(
+                    {"role": "system", "content": f"Here are the risk metrics {report['metrics']} for {ticker}"})
                 st.session_state.msg_history.append(
                     {"role": "system", "content": f"Here are the dividends {dividends_df} for {ticker}"})
                 
@@ -1,38 +1,32 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, date
 from utils_portfolio import update_portfolio_summary
+from utils_nav import get_portfolio_navs
+from utils_journal import TransactionJournal, apply_update
+from utils_barstore import get_close_panel
 from pathlib import Path
 from utils_gdrive import upload_to_google_drive, load_data
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from utils_markdown import display_md
-from utils_banner import breakingnews, data, news
+from utils_banner import news_banner
 
 
-breakingnews(news, '', 'filled') 
+news_banner()
 
    
-# Set file path and initialize session state for buy and sell transactions 
-buy_transaction_fp = Path(f'user_data/{st.session_state.user_id}/portfolio/buy_transactions.csv')
-sell_transaction_fp = Path(f'user_data/{st.session_state.user_id}/portfolio/sell_transactions.csv')
+# Transaction journal of the user and session state for buy and sell transactions
+journal = TransactionJournal(Path(f'user_data/{st.session_state.user_id}/portfolio'))
 
 if 'buy_transactions' not in st.session_state:
-    # use existing transaction records if exists
-    if buy_transaction_fp.exists():
-        st.session_state.buy_transactions = pd.read_csv(buy_transaction_fp)
-    # create an empty DF
-    else:
-        st.session_state.buy_transactions = pd.DataFrame(columns=['Ticker', 'Quantity', 'Buy Date', 'Buy Price', 'Stock Exchange'])
+    # existing transaction records, or an empty DF
+    st.session_state.buy_transactions = journal.load('buy')
 
 if 'sell_transactions' not in st.session_state:
-    # use existing transaction records if exists
-    if sell_transaction_fp.exists():
-        st.session_state.sell_transactions = pd.read_csv(sell_transaction_fp)
-    # create an empty DF
-    else:
-        st.session_state.sell_transactions = pd.DataFrame(columns=['Ticker', 'Quantity', 'Sell Date', 'Sell Price', 'Stock Exchange'])
+    # existing transaction records, or an empty DF
+    st.session_state.sell_transactions = journal.load('sell')
 
 # Load portfolio summary if exists
 if not st.session_state.buy_transactions.empty: #and not st.session_state.sell_transactions.empty:
@@ -54,9 +48,6 @@ if 'portfolio_summary' not in st.session_state:
 if 'total_investment_by_exchange' not in st.session_state:
     st.session_state.total_investment_by_exchange = pd.DataFrame(columns=['Stock Exchange', 'Total Investment'])
 
-# set filepath for writing buy and sell transactions entry at sidebar
-portfolio_folder = Path(f'user_data/{st.session_state.user_id}/portfolio')
-
 # Streamlit app
 #st.title("Stock Investment Portfolio")
 #display_md.display("Stock Investment Portfolio",  font_size="28px", color='#1c51ba')
@@ -96,16 +87,15 @@ with st.sidebar:
             buy_submit = st.form_submit_button("Add")
 
         if buy_submit:
-            new_buy = pd.DataFrame({
-                'Ticker': [buy_ticker],
-                'Quantity': [buy_quantity],
-                'Buy Date': [buy_date],
-                'Buy Price': [buy_price],
-                'Stock Exchange': [market]  # Add stock exchange information
+            new_buy = journal.append('buy', {
+                'Ticker': buy_ticker,
+                'Quantity': buy_quantity,
+                'Buy Date': buy_date,
+                'Buy Price': buy_price,
+                'Stock Exchange': market  # Add stock exchange information
             })
             st.session_state.buy_transactions = pd.concat([st.session_state.buy_transactions, new_buy], ignore_index=True)
 
-            st.session_state.buy_transactions.to_csv(portfolio_folder / "buy_transactions.csv", index=False)
             update_portfolio_summary()
             upload_to_google_drive()
 
@@ -121,11 +111,12 @@ with st.sidebar:
                 update_buy_submit = st.form_submit_button("Update")
 
                 if update_buy_submit:
-                    st.session_state.buy_transactions.loc[
-                        st.session_state.buy_transactions['Ticker'] == buy_update_ticker, 
-                        ['Quantity', 'Buy Date', 'Buy Price']
-                    ] = updated_buy_quantity, updated_buy_date, updated_buy_price
-                    st.session_state.buy_transactions.to_csv(portfolio_folder / "buy_transactions.csv", index=False)
+                    updated_buy = {'Quantity': updated_buy_quantity,
+                                   'Buy Date': updated_buy_date,
+                                   'Buy Price': updated_buy_price}
+                    journal.update('buy', buy_update_ticker, updated_buy)
+                    st.session_state.buy_transactions = apply_update(
+                        st.session_state.buy_transactions, 'buy', buy_update_ticker, updated_buy)
                     update_portfolio_summary()
                     upload_to_google_drive()
             else:
@@ -141,15 +132,14 @@ with st.sidebar:
             sell_submit = st.form_submit_button("Sell")
 
         if sell_submit:
-            new_sell = pd.DataFrame({
-                'Ticker': [sell_ticker],
-                'Quantity': [-sell_quantity],  # Convert sell quantity to negative
-                'Sell Date': [sell_date],
-                'Sell Price': [sell_price],
-                'Stock Exchange': [market]  # Add stock exchange information
+            new_sell = journal.append('sell', {
+                'Ticker': sell_ticker,
+                'Quantity': -sell_quantity,  # Convert sell quantity to negative
+                'Sell Date': sell_date,
+                'Sell Price': sell_price,
+                'Stock Exchange': market  # Add stock exchange information
             })
             st.session_state.sell_transactions = pd.concat([st.session_state.sell_transactions, new_sell], ignore_index=True)
-            st.session_state.sell_transactions.to_csv(portfolio_folder / "sell_transactions.csv",index=False)
             update_portfolio_summary()
             upload_to_google_drive()
 
@@ -165,12 +155,12 @@ with st.sidebar:
                 update_sell_submit = st.form_submit_button("Update")
 
                 if update_sell_submit:
-
-                    st.session_state.sell_transactions.loc[
-                        st.session_state.sell_transactions['Ticker'] == sell_update_ticker,
-                        ['Quantity', 'Sell Date', 'Sell Price']
-                    ] = updated_sell_quantity, updated_sell_date, updated_sell_price
-                    st.session_state.sell_transactions.to_csv(portfolio_folder / "sell_transactions.csv",index=False)
+                    updated_sell = {'Quantity': updated_sell_quantity,
+                                    'Sell Date': updated_sell_date,
+                                    'Sell Price': updated_sell_price}
+                    journal.update('sell', sell_update_ticker, updated_sell)
+                    st.session_state.sell_transactions = apply_update(
+                        st.session_state.sell_transactions, 'sell', sell_update_ticker, updated_sell)
                     update_portfolio_summary()
                     upload_to_google_drive()
             else:
@@ -211,12 +201,13 @@ with tab1:
 
         #display_md.display("Visualization", font_size="28px", color='#1c51ba')
         st.write("##### :blue[Portfolio Visualization]")
-        p1, p2, p3, p4, p5, p6 = st.tabs(['Profit & Loss', 
+        p1, p2, p3, p4, p5, p6, p7 = st.tabs(['Profit & Loss', 
                                       'Total Return', 
                                       'Total Dividends', 
                                       'Industry Distribution', 
                                       'Correlation',
-                                      'Total Investment'])
+                                      'Total Investment',
+                                      'Equity Curve'])
         
         with p6:
             # Display total investment by stock exchange
@@ -319,7 +310,7 @@ with tab1:
         with p5:
             # Heatmap for Correlation
             tickers =  st.session_state.portfolio_summary['Ticker'].tolist()
-            data = yf.download(tickers, period="1y")['Close']
+            data = get_close_panel(tickers, period="1y")
             correlation_matrix = data.corr()
             fig5 = px.imshow(correlation_matrix, 
                             labels=dict(x="Ticker", y="Ticker", color="Correlation"), 
@@ -344,6 +335,76 @@ with tab1:
             
 
             st.plotly_chart(fig5)
+        with p7:
+            # Daily valuation of the portfolio since the first transaction, one per
+            # stock exchange as each is priced in its own currency
+            portfolio_navs = get_portfolio_navs(st.session_state.buy_transactions,
+                                                st.session_state.sell_transactions)
+            for exchange, portfolio_nav in portfolio_navs.items():
+                st.write(f"###### :grey[{exchange}]")
+                nav_metrics = portfolio_nav['metrics']
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("Time-Weighted Return", f"{nav_metrics['Time-Weighted Return']:.2%}")
+                m2.metric("Annualized Return", f"{nav_metrics['Annualized Return']:.2%}")
+                m3.metric("Max Drawdown", f"{nav_metrics['Max Drawdown']:.2%}")
+                m4.metric("Market Value", f"{nav_metrics['Market Value']:,.2f}")
+
+                nav = portfolio_nav['nav']
+                fig7 = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3],
+                                     vertical_spacing=0.05)
+                fig7.add_trace(go.Scatter(x=nav.index, y=nav['TWR'], name='Time-Weighted Return',
+                                          line=dict(color='#25748f')), row=1, col=1)
+                fig7.add_trace(go.Scatter(x=nav.index, y=nav['Drawdown'], name='Drawdown',
+                                          fill='tozeroy', line=dict(color='#f5651d', width=1)), row=2, col=1)
+                fig7.update_yaxes(tickformat='.0%', row=2, col=1)
+                fig7.update_layout(
+                    title={
+                        'text': f'{exchange} - Growth of 1 (Time-Weighted) and Drawdown',
+                        'x': 0.5,
+                        'xanchor': 'center',
+                        'font': {
+                            'color': '#565a61',
+                            'family': 'Arial, sans-serif',
+                            'size': 14,
+                        }
+                    }
+                )
+                st.plotly_chart(fig7, key=f"fig7_{exchange}")
+
+                fig8 = px.area(nav, x=nav.index, y='Market Value',
+                               color_discrete_sequence=['#4c8a5c'])
+                fig8.update_layout(
+                    title={
+                        'text': f'{exchange} - Portfolio Market Value',
+                        'x': 0.5,
+                        'xanchor': 'center',
+                        'font': {
+                            'color': '#565a61',
+                            'family': 'Arial, sans-serif',
+                            'size': 14,
+                        }
+                    },
+                    xaxis_title=None
+                )
+                st.plotly_chart(fig8, key=f"fig8_{exchange}")
+
+                contribution = portfolio_nav['contribution'].reset_index()
+                fig9 = px.bar(contribution, x='Ticker', y='Return Contribution',
+                              hover_data=['P/L'], color_discrete_sequence=['#25748f'])
+                fig9.update_layout(
+                    title={
+                        'text': f'{exchange} - Contribution to Time-Weighted Return by Ticker',
+                        'x': 0.5,
+                        'xanchor': 'center',
+                        'font': {
+                            'color': '#565a61',
+                            'family': 'Arial, sans-serif',
+                            'size': 14,
+                        }
+                    },
+                    yaxis_tickformat='.1%'
+                )
+                st.plotly_chart(fig9, key=f"fig9_{exchange}")
     else:
         st.write("No portfolio data available.")
 
@@ -352,13 +413,14 @@ with tab2:
     if not st.session_state.buy_transactions.empty:
         st.dataframe(
             st.session_state.buy_transactions.style.format({
+                'Buy Date': "{:%Y-%m-%d}",
                 'Buy Price': "{:.3f}"
             }),
             use_container_width=True
         )
         st.download_button(
             "Download CSV",
-            st.session_state.buy_transactions.to_csv(index=False),
+            st.session_state.buy_transactions.to_csv(index=False, date_format='%Y-%m-%d'),
             "buy_transactions.csv",
             "text/csv",
         )
@@ -370,13 +432,14 @@ with tab3:
     if not st.session_state.sell_transactions.empty:
         st.dataframe(
             st.session_state.sell_transactions.style.format({
+                'Sell Date': "{:%Y-%m-%d}",
                 'Sell Price': "{:.3f}"
             }),
             use_container_width=True
         )
         st.download_button(
             "Download CSV",
-            st.session_state.sell_transactions.to_csv(index=False),
+            st.session_state.sell_transactions.to_csv(index=False, date_format='%Y-%m-%d'),
             "sell_transactions.csv",
             "text/csv",
         )
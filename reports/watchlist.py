@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import json
 from pathlib import Path
 import matplotlib.pyplot as plt
 from utils_watchlist import *
+from utils_panel import STRATEGIES
 from utils_markdown import display_md, disclaimer_text, quote_text
 from utils_gdrive import upload_to_google_drive, load_data
 from utils_llm import client, model_option
-from utils_banner import breakingnews, news
+from utils_banner import news_banner
 
 
-breakingnews(news, '', 'filled')  
+news_banner()
 #---- initialize watchlist conversations ---#
 if 'watchlist_history' not in st.session_state:
 
@@ -177,14 +177,17 @@ with col_watchlist:
         
         #display_md.display(quote_text, color="#434a45", font_size="10px", tag='p')
         st.write(f"#### :grey[{watchlist_name}]")
-        fetch_and_display_price(selected_symbols)
+        auto_refresh = st.toggle("Auto-refresh prices", value=False,
+                                 help=f"Update the price table every {AUTO_REFRESH_SECONDS} seconds")
+        signal_strategy = st.selectbox("Signal strategy", [None, *STRATEGIES],
+                                       format_func=lambda name: "None" if name is None else name,
+                                       help="Show the latest daily signal of a trading strategy, with its default parameters")
+        fetch_and_display_price(selected_symbols, auto_refresh=auto_refresh, strategy=signal_strategy)
         tab_names = [f":blue-background[{name}]" for name in selected_names]
         tabs = st.tabs(tab_names)
 
         for tab, symbol in zip(tabs, selected_symbols):
             with tab:
-                _stock = yf.Ticker(symbol)
-
                 #with st.container():
                 
                 st.write("###### Stock Price Chart")
@@ -197,12 +200,12 @@ with col_watchlist:
 
                 # fetch dividends
                 st.write("###### Dividends Trends")
-                filtered_data = fetch_dividends(_stock)
+                filtered_data = fetch_dividends(symbol)
                 plot_dividends(filtered_data)
 
                 # fetch analysts recommendations
                 st.write("###### Analysts Recommendations")
-                analyst_rec, numeric_df, max_value = fetch_recommendations(_stock)
+                analyst_rec, numeric_df, max_value = fetch_recommendations(symbol)
                 if analyst_rec is not None:
                     plot_recommendations(analyst_rec, numeric_df, max_value)
                 else:
@@ -215,34 +218,34 @@ with col_watchlist:
                                                f":red-background[Financial Highlights]"])
                 with tab_1:
                     #st.write("##### Dividend Yield ")
-                    dividends_and_splits_data = get_dividends_and_splits(_stock)
+                    dividends_and_splits_data = get_dividends_and_splits(symbol)
                     st.dataframe(dividends_and_splits_data, hide_index=True, width=400)
                     
                 with tab_2:
                     #st.write("##### Dividend Payout")
-                    dividend_payout = get_dividend_details(_stock)
+                    dividend_payout = get_dividend_details(symbol)
                     st.dataframe(dividend_payout, hide_index=True)
 
                 with tab_3:
                     #st.write("##### Valuation")
-                    valuation_data = get_valuation_measures(_stock)
+                    valuation_data = get_valuation_measures(symbol)
                     st.dataframe(valuation_data,width=300, hide_index=True)
 
                 with tab_4:
-                    financial_highlights = get_financial_highlights(_stock)
+                    financial_highlights = get_financial_highlights(symbol)
                     st.dataframe(financial_highlights, width = 300, height=460,hide_index=True)
                     
 
                 st.session_state.watchlist_history.append(
-                    {"role": "system", "content": f"Here are the valuation metrics for {_stock}: {valuation_data}"})
+                    {"role": "system", "content": f"Here are the valuation metrics for {symbol}: {valuation_data}"})
                 st.session_state.watchlist_history.append(
-                    {"role": "system", "content": f"Here are the dividends payout data for {_stock}: {dividend_payout}"})
+                    {"role": "system", "content": f"Here are the dividends payout data for {symbol}: {dividend_payout}"})
                 st.session_state.watchlist_history.append(
-                    {"role": "system", "content": f"Here are the dividends splits data for {_stock}: {dividends_and_splits_data}"})
+                    {"role": "system", "content": f"Here are the dividends splits data for {symbol}: {dividends_and_splits_data}"})
                 st.session_state.watchlist_history.append(
-                    {"role": "system", "content": f"Here are the analysts recommendations for {_stock}: {analyst_rec}"})
+                    {"role": "system", "content": f"Here are the analysts recommendations for {symbol}: {analyst_rec}"})
                 st.session_state.watchlist_history.append(
-                    {"role": "system", "content": f"Here are the financial highlights for {_stock}: {financial_highlights}"})
+                    {"role": "system", "content": f"Here are the financial highlights for {symbol}: {financial_highlights}"})
 
                 
     else:
@@ -312,7 +315,7 @@ with col_bot:
 
             # fetch earnings calendar
             #    display_md.display("Earnings Calendar")
-            #    earnings_calendar = fetch_earnings_calendar(_stock)
+            #    earnings_calendar = fetch_earnings_calendar(symbol)
             #    if not earnings_calendar:
             #        st.warning("Not Available")
             #    else:
@@ -324,7 +327,7 @@ with col_bot:
             # fetch upgrades
             #if exchange == "NYSE":
             #    display_md.display("Securities Firm Call")
-            #    upgrades_downgrades = fetch_upgrades_downgrades(_stock)
+            #    upgrades_downgrades = fetch_upgrades_downgrades(symbol)
             #if upgrades_downgrades.empty:
             #    st.warning("Not Available")
             #else:
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import utils_panel
+from batch_backtest import RISK_PREFIX, run_batch
+
+
+def _bars(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return pd.DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1000}, index=index)
+
+
+def test_run_batch_keeps_panel_and_risk_total_return(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(utils_panel, "get_histories",
+                        lambda tickers, period, interval="1d": {ticker: _bars(seed=i) for i, ticker in enumerate(tickers)})
+    params = {"macd_fast": 12, "macd_slow": 26, "macd_signal": 9}
+
+    _, rows = run_batch((0, ["AAA", "BBB"], {"AAA": "A", "BBB": "B"}, "SGX", "1y", "MACD", params))
+
+    for row in rows:
+        assert row["Error"] is None
+        assert "Total Return" in row
+        assert RISK_PREFIX + "Total Return" in row
+        assert not np.isnan(row["Total Return"]) and not np.isnan(row[RISK_PREFIX + "Total Return"])
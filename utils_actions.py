@@ -0,0 +1,129 @@
+import os
+import json
+import time
+from pathlib import Path
+import pandas as pd
+from utils_provider import get_provider
+from utils_scheduler import KeyedLocks, map_in_context
+
+
+# Corporate actions store: dividends and splits per symbol, shared by the
+# backtest, watchlist and portfolio pages. Ex-dates are stored tz-naive
+# (exchange local date) so they compare directly with transaction dates.
+STORE_ROOT = Path("./cache/actions")
+
+# Seconds before a symbol is checked for new dividends or splits
+REFRESH_AFTER = 12 * 60 * 60
+
+# Days re-read before the last sync, in case an ex-date was published late
+OVERLAP_DAYS = 7
+
+MAX_WORKERS = 8
+
+COLUMNS = ["Dividends", "Stock Splits"]
+
+_lock_for = KeyedLocks()
+
+
+def _paths(symbol):
+    return STORE_ROOT / f"{symbol}.parquet", STORE_ROOT / f"{symbol}.json"
+
+
+def _normalize(actions):
+    # keep only non-zero dividend / split rows on a tz-naive ex-date index
+    actions = actions.reindex(columns=COLUMNS).fillna(0.0).astype(float)
+    if isinstance(actions.index, pd.DatetimeIndex) and actions.index.tz is not None:
+        actions.index = actions.index.tz_localize(None)
+    actions.index = pd.DatetimeIndex(actions.index).normalize()
+    actions.index.name = "Date"
+    actions = actions[(actions != 0).any(axis=1)]
+    return actions.groupby(level=0).sum().sort_index()
+
+
+def _load(symbol):
+    data_path, meta_path = _paths(symbol)
+    if not data_path.exists() or not meta_path.exists():
+        return None, {}
+    try:
+        return pd.read_parquet(data_path), json.loads(meta_path.read_text())
+    except Exception as e:
+        print(f"Actions store: could not read {data_path}: {e}")
+        return None, {}
+
+
+def _save(symbol, actions, meta):
+    data_path, meta_path = _paths(symbol)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = data_path.with_suffix(".tmp")
+    actions.to_parquet(tmp_path)
+    os.replace(tmp_path, data_path)
+    meta_path.write_text(json.dumps(meta))
+
+
+def get_actions(symbol):
+    """
+    Dividends and splits for a symbol, refreshed incrementally.
+
+    The first call downloads the full action history; later refreshes only
+    read the daily bars since the last sync and pick up any new ex-dates. A
+    new split refetches the full history, since it re-adjusts earlier dividends.
+
+    Returns:
+    - A DataFrame with 'Dividends' and 'Stock Splits' columns indexed by
+      tz-naive ex-date; only dates with an action are included.
+    """
+    with _lock_for(symbol):
+        actions, meta = _load(symbol)
+        now = time.time()
+        if actions is not None and now - meta.get("checked_at", 0) < REFRESH_AFTER:
+            return actions.copy()
+
+        today = pd.Timestamp.now().normalize()
+        try:
+            if actions is None:
+                actions = _normalize(get_provider().actions(symbol))
+            else:
+                since = pd.Timestamp(meta["synced_through"]) - pd.Timedelta(days=OVERLAP_DAYS)
+                bars = get_provider().history(symbol, start=since, interval="1d")
+                fresh = _normalize(bars) if not bars.empty else bars
+                splits = fresh["Stock Splits"][fresh["Stock Splits"] != 0] if not fresh.empty else fresh
+                if not splits.empty and not splits.index.isin(actions.index[actions["Stock Splits"] != 0]).all():
+                    # a new split restates every earlier dividend on the new share basis
+                    actions = _normalize(get_provider().actions(symbol))
+                elif not fresh.empty:
+                    # new rows replace any stored row on the same ex-date
+                    actions = pd.concat([actions[~actions.index.isin(fresh.index)], fresh]).sort_index()
+        except Exception as e:
+            print(f"Actions store: refresh failed for {symbol}: {e}")
+            if actions is None:
+                return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype=float)
+            return actions.copy()
+
+        _save(symbol, actions, {"checked_at": now, "synced_through": today.isoformat()})
+        return actions.copy()
+
+
+def get_dividends(symbol):
+    """
+    Dividend amounts for a symbol as a Series indexed by tz-naive ex-date.
+    """
+    dividends = get_actions(symbol)["Dividends"]
+    return dividends[dividends != 0].rename("Dividends")
+
+
+def get_splits(symbol):
+    """
+    Split ratios for a symbol as a Series indexed by tz-naive date.
+    """
+    splits = get_actions(symbol)["Stock Splits"]
+    return splits[splits != 0].rename("Stock Splits")
+
+
+def get_dividends_batch(symbols):
+    """
+    Dividend series for several symbols, refreshed concurrently.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    return dict(zip(symbols, map_in_context(get_dividends, symbols, MAX_WORKERS)))
@@ -1,10 +1,10 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-from ta.trend import MACD
-from ta.momentum import RSIIndicator
+from utils_fundamentals import get_info
+from utils_actions import get_dividends
+from utils_montecarlo import monte_carlo
 
 
 # Define strategy parameters and their default states
@@ -44,6 +44,19 @@ strategy_params = {
 
 }
 
+
+def _frame_hash(df):
+    # st.cache_data key of a DataFrame: backtest results carry a cheap content
+    # address (see utils_resultcache), anything else is hashed by value.
+    # Only pass a result's hist as run_cached_backtests returned it: attrs are
+    # copied to derived frames (slices, copies, added columns), which would
+    # keep the result's cache_key and get a stale cache hit.
+    key = df.attrs.get("cache_key")
+    if key is not None:
+        return key
+    return pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes() + str(list(df.columns)).encode()
+
+
 # define trading strategy
 trading_strategy = ["Moving Average Crossover", 
                     "Bollinger Bands", 
@@ -51,110 +64,10 @@ trading_strategy = ["Moving Average Crossover",
                     "RSI", 
                     ""]
 
-def fetch_stock_data(ticker, 
-                     period, 
-                     sma_period, 
-                     ema_period, 
-                     bb_period, 
-                     bb_std, 
-                     macd_fast, 
-                     macd_slow, 
-                     macd_signal, 
-                     rsi_period, 
-                     strategy):
-    
-    # Fetch the stock data using yfinance
-    stock_data = yf.Ticker(ticker)
-    hist = stock_data.history(period=period)
-
-    # Check if the fetched data is empty
-    if hist.empty:
-        st.error(f"No data found for {ticker} over the specified period.")
-        return None, None
-
-    # Initialize signals and positions
-    hist['Signal'] = 0.0
-    hist['Position'] = 0.0
-
-    # "Moving Average Crossover
-    if strategy == trading_strategy[0]:
-        if sma_period is None or ema_period is None:
-            st.error(
-                "SMA and EMA periods must be specified for Moving Average Crossover.")
-            return None, None
-
-        hist['SMA'] = hist['Close'].rolling(window=sma_period).mean()
-        hist['EMA'] = hist['Close'].ewm(span=ema_period, adjust=False).mean()
-
-        if len(hist) < max(sma_period, ema_period):
-            st.error(
-                f"Not enough data to calculate {sma_period}-day SMA or {ema_period}-day EMA for {ticker}.")
-            return None, None
-
-        hist.loc[hist.index[sma_period:], 'Signal'] = np.where(
-            hist.loc[hist.index[sma_period:], 'EMA'] > hist.loc[hist.index[sma_period:], 'SMA'], 1.0, 0.0)
-        hist['Position'] = hist['Signal'].diff()
-    
-    #Bollinger Bands
-    elif strategy == trading_strategy[1]:
-        if bb_period is None or bb_std is None:
-            st.error(
-                "Bollinger Bands period and standard deviations must be specified.")
-            return None, None
-
-        hist['Middle_Band'] = hist['Close'].rolling(window=bb_period).mean()
-        hist['Upper_Band'] = hist['Middle_Band'] + \
-            (hist['Close'].rolling(window=bb_period).std() * bb_std)
-        hist['Lower_Band'] = hist['Middle_Band'] - \
-            (hist['Close'].rolling(window=bb_period).std() * bb_std)
-
-        hist.loc[hist['Close'] < hist['Lower_Band'], 'Signal'] = 1.0
-        hist.loc[hist['Close'] > hist['Upper_Band'], 'Signal'] = -1.0
-        hist['Position'] = hist['Signal'].diff()
-
-    # MACD
-    elif strategy == trading_strategy[2]:
-        if macd_fast is None or macd_slow is None or macd_signal is None:
-            st.error("MACD fast, slow, and signal periods must be specified.")
-            return None, None
-
-        macd_indicator = MACD(hist['Close'], window_slow=macd_slow,
-                              window_fast=macd_fast, window_sign=macd_signal)
-        hist['MACD'] = macd_indicator.macd()
-        hist['Signal_Line'] = macd_indicator.macd_signal()
-        hist['MACD_Histogram'] = macd_indicator.macd_diff()
 
-        hist['Signal'][hist['MACD'] > hist['Signal_Line']] = 1.0
-        hist['Signal'][hist['MACD'] < hist['Signal_Line']] = -1.0
-        hist['Position'] = hist['Signal'].diff()
-
-    # RSI
-    elif strategy == trading_strategy[3]:
-        if rsi_period is None:
-            st.error("RSI period must be specified.")
-            return None, None
-
-        rsi_indicator = RSIIndicator(hist['Close'], window=rsi_period)
-        hist['RSI'] = rsi_indicator.rsi()
-
-        hist['Signal'][hist['RSI'] < 30] = 1.0
-        hist['Signal'][hist['RSI'] > 70] = -1.0
-        hist['Position'] = hist['Signal'].diff()
-
-    else:
-        st.error("Invalid strategy selected.")
-        return None, None
-
-    return hist, strategy
-
-
-@st.cache_data
 def fetch_dividends(ticker):
-    # Fetch the stock data
-    stock = yf.Ticker(ticker)
-
-    # Fetch historical dividends
-    dividends = stock.dividends
+    # Fetch historical dividends from the corporate actions store
+    dividends = get_dividends(ticker)
 
     if dividends.empty:
         st.warning("No dividend data available.")
@@ -166,30 +79,8 @@ def fetch_dividends(ticker):
         return dividends_df
 
 
-# Function to backtest the strategy
-@st.cache_data
-def backtest_strategy(hist, strategy):
-    # Calculate daily returns
-    hist['Returns'] = hist['Close'].pct_change()
-    # Calculate strategy returns by multiplying daily returns by the previous day's signal
-    hist['Strategy_Returns'] = hist['Returns'] * hist['Signal'].shift(1)
-    # Calculate cumulative returns for the strategy
-    hist['Cumulative_Returns'] = (1 + hist['Strategy_Returns']).cumprod()
-    # Calculate cumulative returns for the benchmark (buy and hold)
-    hist['Cumulative_Benchmark_Returns'] = (1 + hist['Returns']).cumprod()
-
-    # Calculate performance metrics
-    total_return = hist['Cumulative_Returns'].iloc[-1] - 1
-    benchmark_return = hist['Cumulative_Benchmark_Returns'].iloc[-1] - 1
-    num_trades = hist['Position'].abs().sum() / 2
-    win_rate = (hist['Strategy_Returns'] > 0).sum() / \
-               (hist['Strategy_Returns'] != 0).sum()
-    avg_profit = hist[hist['Strategy_Returns'] > 0]['Strategy_Returns'].mean()
-    avg_loss = hist[hist['Strategy_Returns'] < 0]['Strategy_Returns'].mean()
-
-
-
-    # Create a dictionary to store performance metrics
+def format_performance_metrics(strategy, total_return, benchmark_return, num_trades, win_rate, avg_profit, avg_loss):
+    # Markdown summary of the backtest metrics shown next to the charts
     performance_metrics = f"""
 
         :blue[**{strategy} Backtest Results**]
@@ -206,17 +97,14 @@ def backtest_strategy(hist, strategy):
 
         **Average Loss per Trade: {avg_loss:.2%}**. Average loss incurred on losing trades. It helps to understand the typical loss experienced by unsuccessful trades."""
 
-    return hist, performance_metrics
+    return performance_metrics
 
 
 # Function to fetch pre-calculated financial ratios
 # @st.cache_data
 def fetch_financial_ratios(ticker):
-    # Fetch the stock data
-    stock = yf.Ticker(ticker)
-
-    # Get the info dictionary
-    info = stock.info
+    # Get the info dictionary from the shared fundamentals cache
+    info = get_info(ticker)
 
     # Check if data is available
     if not info:
@@ -265,7 +153,7 @@ def fetch_financial_ratios(ticker):
     return pd.DataFrame([ratios]).melt(var_name="Metric", value_name="Value")
 
 
-@st.cache_data
+@st.cache_data(hash_funcs={pd.DataFrame: _frame_hash})
 def plot_strategy(hist, ticker, strategy, sma_period=None, ema_period=None, bb_period=None, bb_std=None):
     if hist is None:
         return
@@ -338,7 +226,7 @@ def plot_dividends(dividends_df, ticker):
     st.pyplot(plt)
 
 
-@st.cache_data
+@st.cache_data(hash_funcs={pd.DataFrame: _frame_hash})
 def plot_backtest_results(hist, ticker):
     # Plot cumulative returns
     plt.figure(figsize=(10, 5))
@@ -357,3 +245,85 @@ def plot_backtest_results(hist, ticker):
 
 
 
+
+
+@st.cache_data
+def plot_sweep_heatmap(results, ticker, x_name, y_name=None):
+    # heatmaps of total return and win rate over the swept parameter grid
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, metric in zip(axes, ["Total Return", "Win Rate"]):
+        if y_name:
+            grid = results.pivot_table(index=x_name, columns=y_name, values=metric)
+        else:
+            grid = results.set_index(x_name)[[metric]].sort_index().T
+        image = ax.imshow(grid.to_numpy(dtype=float), aspect='auto', origin='lower', cmap='RdYlGn')
+        # label about 10 ticks per axis
+        xticks = np.arange(0, grid.shape[1], max(1, grid.shape[1] // 10))
+        ax.set_xticks(xticks, [grid.columns[i] for i in xticks], rotation=45)
+        if y_name:
+            yticks = np.arange(0, grid.shape[0], max(1, grid.shape[0] // 10))
+            ax.set_yticks(yticks, [grid.index[i] for i in yticks])
+            ax.set_xlabel(y_name)
+            ax.set_ylabel(x_name)
+        else:
+            ax.set_yticks([])
+            ax.set_xlabel(x_name)
+        ax.set_title(f'{ticker} - {metric}')
+        fig.colorbar(image, ax=ax, format=lambda value, _: f'{value:.0%}')
+    fig.tight_layout()
+    st.pyplot(fig)
+
+
+@st.cache_data
+def plot_walk_forward(folds, ticker):
+    # out-of-sample return of every walk-forward fold against buy and hold
+    x = np.arange(len(folds))
+    plt.figure(figsize=(10, 5))
+    plt.bar(x - 0.2, folds['Test Return'], width=0.4, label=f'{ticker} - Strategy (test window)')
+    plt.bar(x + 0.2, folds['Test Benchmark Return'], width=0.4, label=f'{ticker} - Benchmark (test window)')
+    plt.axhline(0, color='grey', linewidth=0.8)
+    plt.xticks(x, [f"{start:%Y-%m-%d}" for start in folds['Test Start']], rotation=45)
+    plt.title(f'{ticker} - Walk-Forward Test Returns')
+    plt.xlabel('Test Window Start')
+    plt.ylabel('Return')
+    plt.legend()
+    plt.tight_layout()
+    st.pyplot(plt)
+
+
+@st.cache_data
+def plot_portfolio_equity(equity, title):
+    # growth of 1 for the basket portfolio against equal weight buy and hold
+    plt.figure(figsize=(10, 5))
+    plt.plot(equity['Portfolio'], label='Portfolio - Strategy', alpha=0.75)
+    plt.plot(equity['Benchmark'], label='Portfolio - Equal Weight Buy and Hold', alpha=0.75)
+    plt.title(title)
+    plt.xlabel('Date')
+    plt.ylabel('Cumulative Returns')
+    plt.legend()
+    st.pyplot(plt)
+
+
+@st.cache_data(hash_funcs={pd.DataFrame: _frame_hash})
+def run_monte_carlo(hist, n_paths, block_size, seed):
+    # monte_carlo cached on the backtest's result key, the seed makes reruns repeat the same paths
+    return monte_carlo(hist, n_paths, block_size, seed)
+
+
+@st.cache_data
+def plot_monte_carlo(paths, ticker):
+    # distribution of bootstrapped total returns, strategy against benchmark
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    bins = np.linspace(*np.nanpercentile(paths[['Total Return', 'Benchmark Return']], [0.5, 99.5]), 60)
+    axes[0].hist(paths['Total Return'], bins=bins, alpha=0.6, label='Strategy')
+    axes[0].hist(paths['Benchmark Return'], bins=bins, alpha=0.6, label='Benchmark')
+    axes[0].set_title(f'{ticker} - Bootstrapped Total Return')
+    axes[0].set_xlabel('Total Return')
+    axes[0].legend()
+    axes[1].hist(paths['Max Drawdown'], bins=60, alpha=0.6, label='Strategy')
+    axes[1].hist(paths['Benchmark Max Drawdown'], bins=60, alpha=0.6, label='Benchmark')
+    axes[1].set_title(f'{ticker} - Bootstrapped Max Drawdown')
+    axes[1].set_xlabel('Max Drawdown')
+    axes[1].legend()
+    fig.tight_layout()
+    st.pyplot(fig)
@@ -1,16 +1,21 @@
-import yfinance as yf
-import streamlit as st
-from utils_markdown import display_md
 import streamlit_antd_components as sac
 import requests
 import xml.etree.ElementTree as ET
+import time
+import threading
+from datetime import datetime
+from utils_barstore import get_histories
+from utils_scheduler import fetch_priority, PRIORITY_LOW
+
+# Seconds between background refreshes of the index quotes and headlines
+BANNER_REFRESH_SECONDS = 300
 
 
 def CNAheadlines(rss_url):
 
     
     # Fetch the RSS feed
-    response = requests.get(rss_url)
+    response = requests.get(rss_url, timeout=10)
     response.raise_for_status()
 
     # Parse the XML content
@@ -53,17 +58,19 @@ def get_indices_data(indices, days=5):
     - days: Number of past days to fetch data for (default is 5).
 
     Returns:
-    - A dictionary with index names as keys and data including last close, 
-      previous close, difference, and percentage difference as values.
+    - A list of (name, last close, percentage change) tuples, with "N/A"
+      values when an index has no data.
     """
     results = []
 
+    # history for every index is synced concurrently through the bar store
+    histories = get_histories(indices.values(), period=f"{days}d")
+
     for name, ticker in indices.items():
         try:
-            # Fetch historical data
-            data = yf.Ticker(ticker).history(period=f"{days}d")
+            data = histories.get(ticker)
 
-            if len(data) >= 2:
+            if data is not None and len(data) >= 2:
                 last_close = data['Close'].iloc[-1]
                 previous_close = data['Close'].iloc[-2]
                 change = last_close - previous_close
@@ -75,9 +82,11 @@ def get_indices_data(indices, days=5):
                 #else:
                 #    results.append(f" **{name} :** {last_close:.2f} {change_symbol}{abs(pct_change):.2f}%")
             else:
-                results.append("Not enough data available.")
+                # keep the (name, value, delta) shape expected by the metrics grid
+                results.append((name, "N/A", None))
         except Exception as e:
-            results[name] = {"Error": str(e)}
+            print(f"Index data failed for {name}: {e}")
+            results.append((name, "N/A", None))
     
     return results
     #return ' | '.join(results)
@@ -103,12 +112,95 @@ indices = {
     "USD/JPY": "JPY=X",
     "USD/SGD": "SGD=X",
 }
-data = get_indices_data(indices)
-
 
 # -----set up news ticker ------#
 # RSS feed URL
 rss_url = "https://www.channelnewsasia.com/api/v1/rss-outbound-feed?_format=xml&category=6936"
-news = CNAheadlines(rss_url)  # utils
 
-#st.write(data)
\ No newline at end of file
+
+class BannerRefresher:
+    """
+    Refreshes the index quotes and CNA headlines on a daemon thread and
+    publishes the latest snapshot, so pages render the banner without
+    waiting on the network. A failed or slow refresh keeps serving the
+    previous snapshot together with its timestamp.
+    """
+
+    def __init__(self, interval=BANNER_REFRESH_SECONDS):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread = None
+        self._snapshot = {"indices": [], "news": "Loading headlines...", "updated_at": None}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="banner-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def refresh(self):
+        with self._lock:
+            snapshot = dict(self._snapshot)
+
+        refreshed = False
+        try:
+            # background work must not delay what users are looking at
+            with fetch_priority(PRIORITY_LOW):
+                snapshot["indices"] = get_indices_data(indices)
+            refreshed = True
+        except Exception as e:
+            print(f"Banner refresh failed for indices: {e}")
+        try:
+            snapshot["news"] = CNAheadlines(rss_url)
+            refreshed = True
+        except Exception as e:
+            print(f"Banner refresh failed for news: {e}")
+
+        if refreshed:
+            snapshot["updated_at"] = datetime.now()
+        with self._lock:
+            self._snapshot = snapshot
+
+    def snapshot(self):
+        with self._lock:
+            snapshot = dict(self._snapshot)
+        updated_at = snapshot["updated_at"]
+        snapshot["stale"] = updated_at is None or \
+            (datetime.now() - updated_at).total_seconds() > 2 * self.interval
+        return snapshot
+
+
+_refresher = BannerRefresher()
+
+
+def get_banner_snapshot():
+    """
+    Latest banner snapshot, starting the background refresher on first use.
+
+    Returns:
+    - A dictionary with 'indices' [(name, value, delta)], 'news' (str),
+      'updated_at' (datetime or None) and 'stale' (bool).
+    """
+    _refresher.start()
+    return _refresher.snapshot()
+
+
+def as_of(snapshot):
+    # Timestamp label for the banner, flags data older than two refresh cycles
+    if snapshot["updated_at"] is None:
+        return "Updating..."
+    label = f"As of {snapshot['updated_at']:%d %b %H:%M}"
+    return f"{label} (refreshing)" if snapshot["stale"] else label
+
+
+def news_banner(variant='filled'):
+    """
+    creates news ticker from the latest background snapshot
+    """
+    snapshot = get_banner_snapshot()
+    breakingnews(f"{snapshot['news']} ☛ {as_of(snapshot)}", '', variant)
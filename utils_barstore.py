@@ -0,0 +1,229 @@
+import os
+import json
+import hashlib
+import time
+from pathlib import Path
+import pandas as pd
+from utils_provider import get_provider, period_start
+from utils_scheduler import KeyedLocks, map_in_context
+
+
+# Local OHLCV bar store shared by every page.
+# One parquet file per (interval, symbol) plus a small json sidecar that records
+# how far back the file is complete and when it was last synced with Yahoo.
+STORE_ROOT = Path("./cache/bars")
+
+# Seconds a stored series is served as-is before new bars are requested
+REFRESH_AFTER = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 1800,
+    "90m": 1800,
+    "1h": 1800,
+}
+DEFAULT_REFRESH_AFTER = 900
+
+# Worker threads used when syncing several symbols at once
+MAX_WORKERS = 8
+
+# one lock per stored file (symbol, interval) so concurrent sessions never interleave writes
+_lock_for = KeyedLocks()
+
+
+def _paths(symbol, interval):
+    folder = STORE_ROOT / interval
+    return folder / f"{symbol}.parquet", folder / f"{symbol}.json"
+
+
+def _is_intraday(interval):
+    return interval.endswith("m") or interval.endswith("h")
+
+
+def _refresh_after(interval):
+    return REFRESH_AFTER.get(interval, DEFAULT_REFRESH_AFTER)
+
+
+def _slice_period(bars, period):
+    # Cut the stored series down to the requested period
+    if bars.empty or period in (None, "max"):
+        return bars
+
+    if period.endswith("d") and period[:-1].isdigit():
+        # last N trading sessions, same as yfinance
+        sessions = bars.index.normalize().unique()
+        n = int(period[:-1])
+        if n >= len(sessions):
+            return bars
+        return bars[bars.index >= sessions[-n]]
+
+    start = period_start(period)
+    if bars.index.tz is not None:
+        start = start.tz_localize(bars.index.tz)
+    return bars[bars.index >= start]
+
+
+def _load(symbol, interval):
+    data_path, meta_path = _paths(symbol, interval)
+    if not data_path.exists() or not meta_path.exists():
+        return None, {}
+    try:
+        return pd.read_parquet(data_path), json.loads(meta_path.read_text())
+    except Exception as e:
+        # a damaged file is simply rebuilt on the next sync
+        print(f"Bar store: could not read {data_path}: {e}")
+        return None, {}
+
+
+def data_version(bars):
+    """
+    Content hash of bars, a close Series or a close panel; changes whenever
+    a bar is added or prices are re-adjusted. Stored with every write so
+    readers get it for free.
+    """
+    frame = pd.DataFrame(bars)
+    digest = hashlib.sha1(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    digest.update(",".join(map(str, frame.columns)).encode())
+    return digest.hexdigest()
+
+
+def _stamp(bars, meta):
+    # carry the data version on the frame (attrs survive slicing and copies)
+    bars.attrs["data_version"] = meta.get("version") or data_version(bars)
+    return bars
+
+
+def _save(symbol, interval, bars, meta):
+    data_path, meta_path = _paths(symbol, interval)
+    data_path.parent.mkdir(parents=True, exist_ok=True)
+    meta["version"] = data_version(bars)
+
+    # write to a temp file first so readers never see a half written file
+    tmp_path = data_path.with_suffix(".tmp")
+    bars.to_parquet(tmp_path)
+    os.replace(tmp_path, data_path)
+    meta_path.write_text(json.dumps(meta))
+
+
+def _download(symbol, start, interval):
+    if start is None:
+        return get_provider().history(symbol, period="max", interval=interval)
+    return get_provider().history(symbol, start=start, interval=interval)
+
+
+def _merge(bars, fresh):
+    # newer rows win, the last stored bar may have been an unfinished one
+    merged = pd.concat([bars, fresh])
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+def _has_actions(bars):
+    for col in ["Dividends", "Stock Splits"]:
+        if col in bars.columns and (bars[col].fillna(0) != 0).any():
+            return True
+    return False
+
+
+def _sync(symbol, period, interval):
+    """
+    Bring the stored series for symbol/interval up to date for the requested
+    period and return the whole stored series.
+    """
+    with _lock_for((symbol, interval)):
+        bars, meta = _load(symbol, interval)
+        start = period_start(period)
+        covered_from = meta.get("covered_from")
+
+        covers = bars is not None and (
+            covered_from == "max"
+            or (start is not None and covered_from is not None and pd.Timestamp(covered_from) <= start)
+        )
+        now = time.time()
+
+        if covers and now - meta.get("checked_at", 0) < _refresh_after(interval):
+            return _stamp(bars, meta)
+
+        try:
+            if covers and not bars.empty:
+                # only ask for bars from the last stored one onwards
+                last = bars.index[-1]
+                fresh = _download(symbol, last if _is_intraday(interval) else last.normalize(), interval)
+                new_rows = fresh[fresh.index > last]
+
+                if not _is_intraday(interval) and _has_actions(new_rows):
+                    # adjusted prices shift after a dividend or split, resync the covered range
+                    resync_from = None if covered_from == "max" else pd.Timestamp(covered_from)
+                    fetched = _download(symbol, resync_from, interval)
+                    bars = fetched if not fetched.empty else _merge(bars, fresh)
+                else:
+                    bars = _merge(bars, fresh)
+            else:
+                fetched = _download(symbol, start, interval)
+                if fetched.empty:
+                    return bars if bars is not None else fetched
+                bars = fetched if bars is None else _merge(bars, fetched)
+
+                # keep the oldest coverage when the file already reached further back
+                if start is None or covered_from == "max":
+                    covered_from = "max"
+                elif covered_from is None or pd.Timestamp(covered_from) > start:
+                    covered_from = start.isoformat()
+        except Exception as e:
+            # serve whatever is stored when Yahoo is unavailable
+            print(f"Bar store: sync failed for {symbol} ({interval}): {e}")
+            return bars if bars is not None else pd.DataFrame()
+
+        meta = {"covered_from": covered_from, "checked_at": now}
+        _save(symbol, interval, bars, meta)
+        return _stamp(bars, meta)
+
+
+def get_history(symbol, period="1mo", interval="1d"):
+    """
+    Drop-in replacement for yf.Ticker(symbol).history(period=period, interval=interval)
+    served from the local bar store.
+
+    Parameters:
+    - symbol: Ticker symbol (e.g., 'D05.SI').
+    - period: yfinance style period ('5d', '1mo', '1y', 'ytd', 'max', ...).
+    - interval: Bar interval ('1d', '1m', ...).
+
+    Returns:
+    - A DataFrame of OHLCV bars; empty if no data is available. When the
+      bars come from the store, bars.attrs['data_version'] identifies them.
+    """
+    bars = _sync(symbol, period, interval)
+    return _slice_period(bars, period).copy()
+
+
+def get_histories(symbols, period="1mo", interval="1d"):
+    """
+    Sync several symbols concurrently and return a dict of symbol -> bars.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    results = map_in_context(lambda symbol: get_history(symbol, period, interval), symbols, MAX_WORKERS)
+    return dict(zip(symbols, results))
+
+
+def get_close_panel(symbols, period="1y", interval="1d"):
+    """
+    Closing prices for several symbols aligned by date (dates x symbols),
+    a local replacement for yf.download(symbols, period=period)['Close'].
+    """
+    closes = {}
+    for symbol, bars in get_histories(symbols, period, interval).items():
+        if bars.empty:
+            continue
+        close = bars["Close"]
+        # align SGX and NYSE daily bars on the trading date rather than UTC
+        if not _is_intraday(interval) and close.index.tz is not None:
+            close = close.tz_localize(None)
+        closes[symbol] = close
+
+    panel = pd.DataFrame(closes)
+    return panel.reindex(columns=[s for s in dict.fromkeys(symbols) if s in closes])
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from utils_metrics import periods_per_year
+
+
+# Basket backtest: the chosen strategy runs on every selected ticker and one
+# portfolio with a shared cash balance follows the signals. Tickers are
+# aligned on the trading date (tz stripped, like get_close_panel) and the
+# portfolio is rebalanced to its target weights at every close; weights,
+# returns and the equity curve are plain matrix operations on the panel.
+#
+# The portfolio is long only: a buy/hold signal (1.0) makes a ticker
+# eligible, sell (-1.0) and flat (0.0) leave its share in cash.
+
+ALLOCATIONS = ["Equal Weight", "Volatility Scaled", "Max Position Cap"]
+
+# Defaults for the allocation rules
+MAX_POSITION = 0.2
+VOL_WINDOW = 20
+
+
+def align_basket(hists):
+    """
+    Close and signal panels (dates x tickers) on the union of trading dates.
+    Closes are carried over dates a ticker did not trade, so its return is 0
+    there and its signal is unchanged.
+    """
+    close, signal = {}, {}
+    for ticker, hist in hists.items():
+        index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        close[ticker] = pd.Series(hist["Close"].to_numpy(), index=index)
+        signal[ticker] = pd.Series(hist["Signal"].to_numpy(), index=index)
+    close = pd.DataFrame(close).sort_index()
+    signal = pd.DataFrame(signal).reindex(close.index)
+    listed = close.notna().cummax()
+    return close.ffill().where(listed), signal.ffill().where(listed)
+
+
+def target_weights(close, signal, allocation="Equal Weight", max_position=MAX_POSITION, vol_window=VOL_WINDOW):
+    """
+    Portfolio weights set at each close (dates x tickers); what is not
+    allocated stays in cash.
+
+    Parameters:
+    - allocation: 'Equal Weight' splits the capital over the tickers with a
+      buy signal, 'Volatility Scaled' splits it in proportion to 1 / rolling
+      volatility, 'Max Position Cap' is equal weight capped at max_position.
+    - max_position: Largest weight of one ticker for 'Max Position Cap'.
+    - vol_window: Bars of the rolling volatility for 'Volatility Scaled'.
+    """
+    active = (signal > 0).to_numpy(dtype=float)
+
+    if allocation == "Volatility Scaled":
+        volatility = close.pct_change(fill_method=None).rolling(vol_window).std().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            score = np.where(volatility > 0, active / volatility, 0.0)
+    elif allocation in ("Equal Weight", "Max Position Cap"):
+        score = active
+    else:
+        raise ValueError(f"Invalid allocation rule: {allocation}")
+
+    score = np.nan_to_num(score)
+    total = score.sum(axis=1, keepdims=True)
+    weights = np.divide(score, total, out=np.zeros_like(score), where=total > 0)
+    if allocation == "Max Position Cap":
+        # the capped excess stays in cash
+        weights = np.minimum(weights, max_position)
+    return pd.DataFrame(weights, index=close.index, columns=close.columns)
+
+
+def basket_backtest(hists, allocation="Equal Weight", max_position=MAX_POSITION, vol_window=VOL_WINDOW,
+                    cost_bps=0.0):
+    """
+    Portfolio backtest of several tickers' signals with a shared cash balance.
+
+    Parameters:
+    - hists: Dict of ticker -> DataFrame with 'Close' and 'Signal' (e.g. the
+      'hist' of run_cached_backtests results).
+    - allocation, max_position, vol_window: See target_weights.
+    - cost_bps: Trading cost in basis points of the traded value.
+
+    Returns:
+    - Dict with 'equity' (DataFrame of 'Portfolio' and 'Benchmark' growth of 1,
+      the benchmark being an equal weight buy and hold of the basket),
+      'weights' (DataFrame), 'contribution' (Series of return contributed per
+      ticker) and 'metrics' (dict).
+    """
+    close, signal = align_basket(hists)
+    returns = close.pct_change(fill_method=None).fillna(0.0)
+    weights = target_weights(close, signal, allocation, max_position, vol_window)
+
+    # weights set at a close earn the next bar's return
+    held = weights.shift(1).fillna(0.0)
+    turnover = weights.diff().abs().sum(axis=1)
+    turnover.iloc[0] = weights.iloc[0].abs().sum()
+    bar_returns = held * returns
+    portfolio = bar_returns.sum(axis=1) - turnover * cost_bps / 10000
+
+    # equal weight of the tickers listed so far, rebalanced daily
+    listed = close.notna()
+    benchmark = returns.where(listed).mean(axis=1).fillna(0.0)
+
+    equity = pd.DataFrame({"Portfolio": (1 + portfolio).cumprod(), "Benchmark": (1 + benchmark).cumprod()})
+    per_year = periods_per_year(close.index)
+    years = np.nan if np.isnan(per_year) else (len(close) - 1) / per_year
+    drawdown = equity["Portfolio"] / equity["Portfolio"].cummax() - 1
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics = {
+            "Total Return": equity["Portfolio"].iloc[-1] - 1,
+            "Benchmark Return": equity["Benchmark"].iloc[-1] - 1,
+            "Annualized Return": equity["Portfolio"].iloc[-1] ** (1 / years) - 1 if years > 0 else np.nan,
+            "Annualized Volatility": portfolio.std() * np.sqrt(per_year),
+            "Sharpe Ratio": portfolio.mean() / portfolio.std() * np.sqrt(per_year),
+            "Max Drawdown": drawdown.min(),
+            "Average Invested": held.sum(axis=1).mean(),
+            "Turnover": turnover.sum() / years if years > 0 else np.nan,
+        }
+    metrics = {name: float(value) for name, value in metrics.items()}
+
+    return {
+        "equity": equity,
+        "weights": weights,
+        "contribution": bar_returns.sum().rename("Contribution").sort_values(ascending=False),
+        "metrics": metrics,
+    }
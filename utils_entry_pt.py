@@ -13,7 +13,8 @@ import streamlit as st
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from utils_banner import breakingnews, news, data
+from utils_banner import news_banner, get_banner_snapshot, as_of
+from utils_warmup import start_warmup
 
 
 
@@ -141,12 +142,14 @@ def find_user_credentials(user_id, password):
 def login():
 
     # RSS News from CNA
-    breakingnews(news, '', 'filled') 
+    news_banner()
     
-    # Stock Exchange Indices
+    # Stock Exchange Indices (served from the background refresher snapshot)
+    snapshot = get_banner_snapshot()
+    st.caption(as_of(snapshot))
     col1, col2, col3, col4,  = st.columns(4)
     columns = [col1, col2, col3, col4]
-    for i, (name, value, delta) in enumerate(data):
+    for i, (name, value, delta) in enumerate(snapshot["indices"]):
         col = columns[i % 4]  # Cycle through columns
         with col:
             st.metric(label=f":blue[{name}]", value=value, delta=delta, border=True)
@@ -179,6 +182,9 @@ def login():
 
                 download_drive_contents(drive, user_folder_id, local_path)
                 st.success(f"Successfully downloaded to: {local_path}")
+
+                # prefetch the user's watchlist and portfolio symbols in the background
+                start_warmup(user_id, local_path)
                 st.rerun()
 
 
@@ -0,0 +1,58 @@
+import os
+from utils_cache import TTLCache
+from utils_provider import get_provider
+from utils_scheduler import map_in_context
+
+
+# Ticker.info barely changes during the day, so one copy per symbol is shared
+# by every page and every Streamlit session in this process.
+INFO_TTL = 6 * 60 * 60
+INFO_MAXSIZE = 512
+
+# Environment overrides of the two limits, applied at app start
+INFO_TTL_ENV = "EQUITYVISION_INFO_TTL"
+INFO_MAXSIZE_ENV = "EQUITYVISION_INFO_MAXSIZE"
+
+MAX_WORKERS = 8
+
+_info_cache = TTLCache(ttl=INFO_TTL, maxsize=INFO_MAXSIZE)
+
+
+def configure_info_cache(ttl=None, maxsize=None):
+    # Change the TTL (seconds) and/or the number of symbols kept; limits not
+    # passed are read from the environment when set there
+    if ttl is None and os.environ.get(INFO_TTL_ENV):
+        ttl = int(os.environ[INFO_TTL_ENV])
+    if maxsize is None and os.environ.get(INFO_MAXSIZE_ENV):
+        maxsize = int(os.environ[INFO_MAXSIZE_ENV])
+    _info_cache.resize(ttl=ttl, maxsize=maxsize)
+
+
+def get_info(symbol):
+    """
+    Cached replacement for yf.Ticker(symbol).info, read through the market data provider.
+
+    Returns:
+    - A copy of the info dictionary (empty if Yahoo returned nothing).
+    """
+    info = _info_cache.get_or_load(symbol, lambda: get_provider().info(symbol) or {})
+    return dict(info)
+
+
+def get_infos(symbols):
+    """
+    Info dictionaries for several symbols, fetched concurrently.
+    Symbols whose info cannot be fetched map to an empty dict.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    def load(symbol):
+        try:
+            return get_info(symbol)
+        except Exception as e:
+            print(f"Could not fetch info for {symbol}: {e}")
+            return {}
+
+    return dict(zip(symbols, map_in_context(load, symbols, MAX_WORKERS)))
@@ -0,0 +1,175 @@
+from utils_cache import TTLCache
+from utils_barstore import data_version
+
+
+# Indicator graph: every indicator is a node that declares the nodes it is
+# built from, and strategies declare which nodes they need. Each distinct
+# (node, params, symbol, data version) is computed once and memoized, so the
+# Bollinger middle band and a crossover SMA of the same window, or the MACD
+# line used by both the signal line and the histogram, are shared.
+#
+# Nodes work on a close Series (one ticker) or a close DataFrame (a panel of
+# tickers as columns) alike.
+
+# Seconds and entries kept in the memo; the data version in the key already
+# invalidates entries when bars change, the ttl only frees memory
+GRAPH_TTL = 60 * 60
+GRAPH_MAXSIZE = 512
+
+
+# --- nodes ---#
+# each node is fn(node, **params) where node(name, **params) returns a dependency
+
+def _close(node):
+    return node.close
+
+
+def _sma(node, window):
+    return node("close").rolling(window=window).mean()
+
+
+def _rolling_std(node, window):
+    return node("close").rolling(window=window).std()
+
+
+def _bollinger_upper(node, window, num_std):
+    return node("sma", window=window) + node("rolling_std", window=window) * num_std
+
+
+def _bollinger_lower(node, window, num_std):
+    return node("sma", window=window) - node("rolling_std", window=window) * num_std
+
+
+def _ema(node, span, min_periods=0):
+    # adjust=False as in ta.utils._ema
+    return node("close").ewm(span=span, min_periods=min_periods, adjust=False).mean()
+
+
+def _macd(node, fast, slow):
+    return node("ema", span=fast, min_periods=fast) - node("ema", span=slow, min_periods=slow)
+
+
+def _macd_signal(node, fast, slow, signal):
+    return node("macd", fast=fast, slow=slow).ewm(span=signal, min_periods=signal, adjust=False).mean()
+
+
+def _macd_histogram(node, fast, slow, signal):
+    return node("macd", fast=fast, slow=slow) - node("macd_signal", fast=fast, slow=slow, signal=signal)
+
+
+def _rsi(node, window):
+    close = node("close")
+    diff = close.diff()
+    # like ta.momentum.RSIIndicator the first bar counts as no move,
+    # padding rows before a ticker's first bar (panels) stay NaN
+    started = close.notna()
+    up = diff.where(diff > 0, 0.0).where(started)
+    down = (-diff.where(diff < 0, 0.0)).where(started)
+    ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean()
+    rsi = 100 - 100 / (1 + ema_up / ema_down)
+    return rsi.mask(ema_down == 0, 100.0)
+
+
+NODES = {
+    "close": _close,
+    "sma": _sma,
+    "rolling_std": _rolling_std,
+    "bollinger_upper": _bollinger_upper,
+    "bollinger_lower": _bollinger_lower,
+    "ema": _ema,
+    "macd": _macd,
+    "macd_signal": _macd_signal,
+    "macd_histogram": _macd_histogram,
+    "rsi": _rsi,
+}
+
+# Indicator columns each strategy needs: column -> (node, node params)
+STRATEGY_INDICATORS = {
+    "Moving Average Crossover": lambda p: {
+        "SMA": ("sma", {"window": p["sma_period"]}),
+        "EMA": ("ema", {"span": p["ema_period"]}),
+    },
+    "Bollinger Bands": lambda p: {
+        "Middle_Band": ("sma", {"window": p["bb_period"]}),
+        "Upper_Band": ("bollinger_upper", {"window": p["bb_period"], "num_std": p["bb_std"]}),
+        "Lower_Band": ("bollinger_lower", {"window": p["bb_period"], "num_std": p["bb_std"]}),
+    },
+    "MACD": lambda p: {
+        "MACD": ("macd", {"fast": p["macd_fast"], "slow": p["macd_slow"]}),
+        "Signal_Line": ("macd_signal", {"fast": p["macd_fast"], "slow": p["macd_slow"], "signal": p["macd_signal"]}),
+        "MACD_Histogram": ("macd_histogram", {"fast": p["macd_fast"], "slow": p["macd_slow"], "signal": p["macd_signal"]}),
+    },
+    "RSI": lambda p: {
+        "RSI": ("rsi", {"window": p["rsi_period"]}),
+    },
+}
+
+
+class _Node:
+    # resolves dependencies of the node being computed through the graph
+    def __init__(self, graph, close, symbol, version):
+        self.graph = graph
+        self.close = close
+        self.symbol = symbol
+        self.version = version
+
+    def __call__(self, name, **params):
+        return self.graph._get(self, name, params)
+
+
+class IndicatorGraph:
+    """
+    Memoized indicator nodes keyed by (node, params, symbol, data version).
+
+    Parameters:
+    - ttl: Seconds a computed node is kept.
+    - maxsize: Maximum number of nodes kept.
+
+    Results are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, ttl=GRAPH_TTL, maxsize=GRAPH_MAXSIZE):
+        self.cache = TTLCache(ttl=ttl, maxsize=maxsize)
+        self.computed = 0
+
+    def _get(self, node, name, params):
+        if name not in NODES:
+            raise ValueError(f"Unknown indicator: {name}")
+        if name == "close":
+            return node.close
+        key = (name, tuple(sorted(params.items())), node.symbol, node.version)
+
+        def compute():
+            self.computed += 1
+            return NODES[name](node, **params)
+
+        return self.cache.get_or_load(key, compute)
+
+    def indicator(self, name, close, symbol, version=None, **params):
+        """
+        One indicator node for a close Series or DataFrame.
+
+        Parameters:
+        - name: Node name (see NODES).
+        - close: Close prices.
+        - symbol: Identifies the series in the memo, e.g. a ticker or a tuple of tickers.
+        - version: Data version of close, computed with data_version() when omitted.
+        """
+        version = version or data_version(close)
+        return self._get(_Node(self, close, symbol, version), name, params)
+
+    def strategy_indicators(self, close, symbol, strategy, params, version=None):
+        """
+        Indicator columns of a strategy, e.g. {'SMA': ..., 'EMA': ...}.
+        """
+        if strategy not in STRATEGY_INDICATORS:
+            raise ValueError(f"Invalid strategy selected: {strategy}")
+        version = version or data_version(close)
+        node = _Node(self, close, symbol, version)
+        return {column: self._get(node, name, node_params)
+                for column, (name, node_params) in STRATEGY_INDICATORS[strategy](params).items()}
+
+
+# one graph per process so every session and strategy shares the work
+indicator_graph = IndicatorGraph()
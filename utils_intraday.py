@@ -0,0 +1,85 @@
+import time
+import pandas as pd
+from utils_provider import get_provider
+from utils_scheduler import KeyedLocks, map_in_context
+
+
+# Bars kept per symbol, a little more than one SGX/NYSE session of 1-minute bars
+MAX_BARS = 600
+
+# Sessions polling within this many seconds of each other share one upstream request
+MIN_POLL_SECONDS = 30
+
+MAX_WORKERS = 8
+
+
+def _latest_session(bars):
+    # bars of the most recent trading day only, like history(period="1d")
+    if bars.empty:
+        return bars
+    last_day = bars.index[-1].normalize()
+    return bars[bars.index >= last_day]
+
+
+class IntradayPoller:
+    """
+    Keeps a rolling in-memory buffer of intraday bars per symbol. The first
+    poll of a symbol loads its latest session; every later poll only asks
+    for the bars after the last one received and appends them.
+
+    Parameters:
+    - interval: Bar interval to poll ('1m', '5m', ...).
+    - max_bars: Bars kept per symbol, older ones are dropped.
+    - min_poll_seconds: Minimum gap between upstream polls of one symbol.
+    """
+
+    def __init__(self, interval="1m", max_bars=MAX_BARS, min_poll_seconds=MIN_POLL_SECONDS):
+        self.interval = interval
+        self.max_bars = max_bars
+        self.min_poll_seconds = min_poll_seconds
+        self._buffers = {}
+        self._polled_at = {}
+        self._lock_for = KeyedLocks()
+
+    def _poll_one(self, symbol):
+        with self._lock_for(symbol):
+            buffer = self._buffers.get(symbol)
+            now = time.monotonic()
+            if buffer is not None and now - self._polled_at.get(symbol, 0) < self.min_poll_seconds:
+                return buffer
+
+            try:
+                if buffer is None or buffer.empty:
+                    buffer = get_provider().history(symbol, period="1d", interval=self.interval)
+                else:
+                    # only the bars after the last one received; that last bar is re-read
+                    # because it may still have been forming when it was fetched
+                    fresh = get_provider().history(symbol, start=buffer.index[-1], interval=self.interval)
+                    if not fresh.empty:
+                        buffer = pd.concat([buffer, fresh])
+                        buffer = buffer[~buffer.index.duplicated(keep="last")].sort_index()
+                        buffer = buffer.iloc[-self.max_bars:]
+            except Exception as e:
+                print(f"Intraday poll failed for {symbol}: {e}")
+                return buffer if buffer is not None else pd.DataFrame()
+
+            self._buffers[symbol] = buffer
+            self._polled_at[symbol] = now
+            return buffer
+
+    def poll(self, symbols):
+        """
+        Poll several symbols concurrently.
+
+        Returns:
+        - A dict of symbol -> bars of the latest session.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        buffers = map_in_context(self._poll_one, symbols, MAX_WORKERS)
+        return {symbol: _latest_session(bars).copy() for symbol, bars in zip(symbols, buffers)}
+
+
+# one poller per process so every session shares the same buffers
+intraday_poller = IntradayPoller()
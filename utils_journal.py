@@ -0,0 +1,206 @@
+import os
+import json
+from pathlib import Path
+import pandas as pd
+from utils_scheduler import KeyedLocks
+
+
+# Portfolio transactions are kept as an append-only journal per side (buy or
+# sell): every add or edit appends one JSON line, so recording a trade costs
+# the same however long the history is. Once the journal passes COMPACT_BYTES
+# it is folded into a typed parquet snapshot, which bounds the work of a load
+# to reading the snapshot plus a short journal.
+#
+# Every record carries a sequence number and the snapshot remembers the last
+# one it holds, so records already folded in are skipped on load even if a
+# compaction was interrupted before the journal was truncated. Sequence
+# numbers are counted up from the highest one on disk, never taken from the
+# clock: a clock stepped back would give new records a number below the
+# snapshot's and they would be skipped as already folded in.
+
+SIDES = {
+    "buy": {"date": "Buy Date", "price": "Buy Price"},
+    "sell": {"date": "Sell Date", "price": "Sell Price"},
+}
+
+# Journal size that triggers a compaction into the snapshot
+COMPACT_BYTES = 64 * 1024
+
+_lock_for = KeyedLocks()
+
+# journal path -> last sequence number written, read from disk on first use
+_last_seq = {}
+
+
+def transaction_columns(side):
+    """
+    Column names of the buy or sell table, in the order the page uses.
+    """
+    names = SIDES[side]
+    return ["Ticker", "Quantity", names["date"], names["price"], "Stock Exchange"]
+
+
+def _typed(df, side):
+    # one set of dtypes whatever the source (snapshot, journal, CSV or form)
+    names = SIDES[side]
+    df = df.reindex(columns=transaction_columns(side))
+    return df.astype({"Ticker": str, "Quantity": "int64", names["price"]: "float64",
+                      "Stock Exchange": str}).assign(
+        **{names["date"]: pd.to_datetime(df[names["date"]]).astype("datetime64[ns]")})
+
+
+def _json_value(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def apply_update(df, side, ticker, values):
+    """
+    Set values (dict of column -> value) on every row of ticker, the edit
+    made by the Edit Buy / Edit Sell forms. Returns the updated table.
+    """
+    df = df.copy()
+    update = _typed(pd.DataFrame([{"Ticker": ticker, **values}]), side)
+    for column in values:
+        df.loc[df["Ticker"] == ticker, column] = update[column].iloc[0]
+    return df
+
+
+class TransactionJournal:
+    """
+    Buy and sell transactions of one user.
+
+    Parameters:
+    - folder: The user's portfolio folder (e.g. user_data/<user_id>/portfolio).
+    - compact_bytes: Journal size that triggers a compaction.
+    """
+
+    def __init__(self, folder, compact_bytes=COMPACT_BYTES):
+        self.folder = Path(folder)
+        self.compact_bytes = compact_bytes
+
+    def _paths(self, side):
+        return (self.folder / f"{side}_transactions.parquet",
+                self.folder / f"{side}_transactions.journal")
+
+    def _read_snapshot(self, side):
+        snapshot_path, _ = self._paths(side)
+        if snapshot_path.exists():
+            try:
+                snapshot = pd.read_parquet(snapshot_path)
+                return _typed(snapshot, side), snapshot.attrs.get("seq", 0)
+            except Exception as e:
+                print(f"Transaction journal: could not read {snapshot_path}: {e}")
+
+        # first use: start from the CSV the page used to write
+        csv_path = self.folder / f"{side}_transactions.csv"
+        if csv_path.exists():
+            return _typed(pd.read_csv(csv_path), side), 0
+        return _typed(pd.DataFrame(columns=transaction_columns(side)), side), 0
+
+    def _read_journal(self, side, after_seq):
+        _, journal_path = self._paths(side)
+        records = []
+        if not journal_path.exists():
+            return records
+        with open(journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # a line cut short by a crash mid-append
+                    print(f"Transaction journal: skipping damaged record in {journal_path}")
+                    continue
+                if record["seq"] > after_seq:
+                    records.append(record)
+        return records
+
+    def _replay(self, df, side, records):
+        added = []
+        for record in records:
+            if record["op"] == "add":
+                added.append(record["row"])
+                continue
+            # an edit applies to the rows added before it
+            if added:
+                df = pd.concat([df, _typed(pd.DataFrame(added), side)], ignore_index=True)
+                added = []
+            df = apply_update(df, side, record["ticker"], record["values"])
+        if added:
+            new_rows = _typed(pd.DataFrame(added), side)
+            df = pd.concat([df, new_rows], ignore_index=True) if not df.empty else new_rows
+        return df
+
+    def load(self, side):
+        """
+        The buy or sell table as a typed DataFrame: snapshot plus journal.
+        """
+        with _lock_for(self._paths(side)[1]):
+            df, seq = self._read_snapshot(side)
+            return self._replay(df, side, self._read_journal(side, seq))
+
+    def _next_seq(self, side):
+        # called under the journal lock
+        _, journal_path = self._paths(side)
+        if journal_path not in _last_seq:
+            _, seq = self._read_snapshot(side)
+            _last_seq[journal_path] = max([seq] + [record["seq"] for record in self._read_journal(side, seq)])
+        _last_seq[journal_path] += 1
+        return _last_seq[journal_path]
+
+    def _append(self, side, record):
+        _, journal_path = self._paths(side)
+        with _lock_for(journal_path):
+            record["seq"] = self._next_seq(side)
+            self.folder.mkdir(parents=True, exist_ok=True)
+            with open(journal_path, "a+b") as f:
+                # start on a fresh line if a crash left the last record unfinished
+                if f.tell() and (f.seek(-1, os.SEEK_END), f.read(1))[1] != b"\n":
+                    f.write(b"\n")
+                f.write((json.dumps(record) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            size = journal_path.stat().st_size
+        if size >= self.compact_bytes:
+            self.compact(side)
+
+    def append(self, side, row):
+        """
+        Record a new transaction; row is a dict of transaction_columns(side).
+
+        Returns:
+        - The transaction as a typed one-row DataFrame, ready to concat to
+          the loaded table.
+        """
+        self._append(side, {"op": "add", "row": {key: _json_value(value) for key, value in row.items()}})
+        return _typed(pd.DataFrame([row]), side)
+
+    def update(self, side, ticker, values):
+        """
+        Record an edit of every transaction of ticker (see apply_update).
+        """
+        self._append(side, {"op": "update", "ticker": ticker,
+                            "values": {key: _json_value(value) for key, value in values.items()}})
+
+    def compact(self, side):
+        """
+        Fold the journal into the snapshot and start an empty journal.
+        """
+        snapshot_path, journal_path = self._paths(side)
+        with _lock_for(journal_path):
+            df, seq = self._read_snapshot(side)
+            records = self._read_journal(side, seq)
+            if not records and snapshot_path.exists():
+                return
+            df = self._replay(df, side, records)
+            df.attrs["seq"] = max([seq] + [record["seq"] for record in records])
+
+            # write to a temp file first so readers never see a half written file
+            self.folder.mkdir(parents=True, exist_ok=True)
+            tmp_path = snapshot_path.with_suffix(".tmp")
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, snapshot_path)
+            journal_path.unlink(missing_ok=True)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+
+
+# Trade ledger and risk metrics of a backtest, computed in O(n) with NumPy so
+# they stay fast on minute-bar histories. Inputs are the 'Close' and 'Signal'
+# columns of PanelBacktest.hist: the signal of a bar
+# is held over the next bar, exactly like 'Strategy_Returns'.
+
+TRADE_COLUMNS = ["Direction", "Entry Date", "Exit Date", "Entry Price", "Exit Price", "Bars Held", "Return"]
+
+
+def _held_exposure(signal):
+    # exposure over each bar: the previous bar's signal, flat when unknown
+    held = np.zeros(len(signal))
+    held[1:] = np.nan_to_num(np.asarray(signal, dtype=float)[:-1])
+    return held
+
+
+def periods_per_year(index):
+    """
+    Bars per year of a DatetimeIndex, measured from the data itself so daily,
+    weekly and intraday bars of any exchange annualize correctly.
+    """
+    if len(index) < 2:
+        return np.nan
+    years = (index[-1] - index[0]) / pd.Timedelta(days=365.25)
+    return (len(index) - 1) / years if years > 0 else np.nan
+
+
+def extract_trades(hist):
+    """
+    Per-trade ledger of a backtest.
+
+    A trade is a run of bars held at the same non-zero exposure: it is entered
+    at the close of the bar whose signal opens it and exited at the close of
+    its last bar.
+
+    Parameters:
+    - hist: DataFrame with 'Close' and 'Signal' columns on a DatetimeIndex.
+
+    Returns:
+    - DataFrame with TRADE_COLUMNS, one row per trade; 'Return' compounds the
+      bar returns of the trade (negated for shorts).
+    """
+    close = hist["Close"].to_numpy(dtype=float)
+    held = _held_exposure(hist["Signal"].to_numpy())
+    n = len(close)
+    if n < 2:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    # run boundaries: every bar where the held exposure changes
+    change = np.flatnonzero(np.diff(held) != 0) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [n]])
+    side = held[starts]
+    trade = side != 0
+    starts, ends, side = starts[trade], ends[trade], side[trade]
+    if not len(starts):
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+
+    returns = np.zeros(n)
+    returns[1:] = close[1:] / close[:-1] - 1
+    growth = np.nan_to_num(1 + returns * held, nan=1.0)
+    # compounded return of every run from one cumulative sum of log growth
+    log_growth = np.concatenate([[0.0], np.cumsum(np.log(growth))])
+    trade_returns = np.exp(log_growth[ends] - log_growth[starts]) - 1
+
+    index = hist.index
+    return pd.DataFrame({
+        "Direction": np.where(side > 0, "Long", "Short"),
+        "Entry Date": index[starts - 1],
+        "Exit Date": index[ends - 1],
+        "Entry Price": close[starts - 1],
+        "Exit Price": close[ends - 1],
+        "Bars Held": ends - starts,
+        "Return": trade_returns,
+    })
+
+
+def risk_metrics(hist, trades=None, risk_free_rate=0.0):
+    """
+    Risk and trading metrics of a backtest as a dict.
+
+    Parameters:
+    - hist: DataFrame with 'Close' and 'Signal' columns on a DatetimeIndex.
+    - trades: Ledger from extract_trades, extracted when omitted.
+    - risk_free_rate: Annual risk-free rate for Sharpe and Sortino.
+
+    Returns:
+    - Dict with total return, annualized return and volatility, Sharpe,
+      Sortino, max drawdown, exposure, turnover and per-trade statistics.
+    """
+    close = hist["Close"].to_numpy(dtype=float)
+    held = _held_exposure(hist["Signal"].to_numpy())
+    if trades is None:
+        trades = extract_trades(hist)
+
+    returns = np.zeros(len(close))
+    if len(close) > 1:
+        returns[1:] = close[1:] / close[:-1] - 1
+    strategy_returns = np.nan_to_num(returns * held)
+
+    per_year = periods_per_year(hist.index)
+    excess = strategy_returns - (0.0 if np.isnan(per_year) else risk_free_rate / per_year)
+
+    equity = np.cumprod(1 + strategy_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else np.zeros(1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        volatility = strategy_returns.std(ddof=1) if len(strategy_returns) > 1 else np.nan
+        downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2)) if len(excess) else np.nan
+        sharpe = excess.mean() / volatility * np.sqrt(per_year)
+        sortino = excess.mean() / downside * np.sqrt(per_year)
+        years = (len(close) - 1) / per_year
+        total_return = equity[-1] - 1 if len(equity) else 0.0
+        annual_return = (1 + total_return) ** (1 / years) - 1 if years > 0 else np.nan
+
+    trade_returns = trades["Return"].to_numpy(dtype=float)
+    wins, losses = trade_returns[trade_returns > 0], trade_returns[trade_returns < 0]
+
+    return {
+        "Total Return": total_return,
+        "Annualized Return": annual_return,
+        "Annualized Volatility": volatility * np.sqrt(per_year),
+        "Sharpe Ratio": sharpe,
+        "Sortino Ratio": sortino,
+        "Max Drawdown": drawdown.min(),
+        "Exposure": np.mean(held != 0) if len(held) else np.nan,
+        # position changes (a reversal counts twice) per year
+        "Turnover": np.abs(np.diff(held)).sum() / years if years > 0 else np.nan,
+        "Trades": len(trades),
+        "Trade Win Rate": len(wins) / len(trade_returns) if len(trade_returns) else np.nan,
+        "Average Trade Return": trade_returns.mean() if len(trade_returns) else np.nan,
+        "Average Winning Trade": wins.mean() if len(wins) else np.nan,
+        "Average Losing Trade": losses.mean() if len(losses) else np.nan,
+        "Average Bars Held": trades["Bars Held"].mean() if len(trades) else np.nan,
+        "Profit Factor": wins.sum() / -losses.sum() if len(losses) else np.nan,
+    }
+
+
+def backtest_report(hist, risk_free_rate=0.0):
+    """
+    Trade ledger and risk metrics of a backtest in one call.
+
+    Returns:
+    - Dict with 'trades' (DataFrame) and 'metrics' (dict).
+    """
+    trades = extract_trades(hist)
+    return {"trades": trades, "metrics": risk_metrics(hist, trades, risk_free_rate)}
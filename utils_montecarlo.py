@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+
+# Monte Carlo robustness check: the strategy and benchmark daily returns of a
+# backtest are resampled together in blocks of consecutive days (keeping
+# volatility clusters and the pairing of both series), and every resampled
+# path is scored. Paths are processed as 2-D arrays (paths x days) in chunks
+# sized to a memory budget.
+
+N_PATHS = 10000
+BLOCK_SIZE = 20
+
+# Default seed of the page, so a rerun shows the same distribution
+SEED = 42
+
+# Bytes of working arrays per chunk of paths
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# Float arrays of one path alive at once while scoring a chunk
+_ARRAYS_PER_PATH = 6
+
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def block_indices(n_days, n_paths, block_size, rng):
+    """
+    Day indices of n_paths circular block-bootstrap paths of n_days each.
+    """
+    n_blocks = -(-n_days // block_size)
+    starts = rng.integers(0, n_days, size=(n_paths, n_blocks, 1))
+    indices = (starts + np.arange(block_size)) % n_days
+    return indices.reshape(n_paths, -1)[:, :n_days]
+
+
+def _score(returns):
+    # total return, max drawdown and win rate of every path (row)
+    equity = np.cumprod(1 + returns, axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    drawdown = (equity / peak - 1).min(axis=1)
+    drawdown = np.minimum(drawdown, 0.0)
+    active = (returns != 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        win_rate = (returns > 0).sum(axis=1) / active
+    return equity[:, -1] - 1, drawdown, win_rate
+
+
+def bootstrap_returns(strategy_returns, benchmark_returns, n_paths=N_PATHS, block_size=BLOCK_SIZE,
+                      seed=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Block-bootstrap distribution of a backtest.
+
+    Parameters:
+    - strategy_returns, benchmark_returns: Daily returns of the same days
+      ('Strategy_Returns' and 'Returns' of a backtest), NaN days are dropped.
+    - n_paths: Resampled paths.
+    - block_size: Consecutive days per block.
+    - seed: Seed for reproducible paths.
+    - chunk_bytes: Memory budget of one chunk of paths.
+
+    Returns:
+    - DataFrame with one row per path: 'Total Return', 'Max Drawdown',
+      'Win Rate', 'Benchmark Return', 'Benchmark Max Drawdown'.
+    """
+    returns = pd.DataFrame({"strategy": strategy_returns, "benchmark": benchmark_returns}).dropna()
+    strategy = returns["strategy"].to_numpy(dtype=float)
+    benchmark = returns["benchmark"].to_numpy(dtype=float)
+    n_days = len(strategy)
+    if n_days < 2:
+        raise ValueError("Not enough returns to resample.")
+
+    block_size = max(1, min(block_size, n_days))
+    chunk = max(1, chunk_bytes // (n_days * 8 * _ARRAYS_PER_PATH))
+    rng = np.random.default_rng(seed)
+
+    columns = {name: np.empty(n_paths) for name in
+               ["Total Return", "Max Drawdown", "Win Rate", "Benchmark Return", "Benchmark Max Drawdown"]}
+    for start in range(0, n_paths, chunk):
+        stop = min(start + chunk, n_paths)
+        indices = block_indices(n_days, stop - start, block_size, rng)
+        total, drawdown, win_rate = _score(strategy[indices])
+        columns["Total Return"][start:stop] = total
+        columns["Max Drawdown"][start:stop] = drawdown
+        columns["Win Rate"][start:stop] = win_rate
+        total, drawdown, _ = _score(benchmark[indices])
+        columns["Benchmark Return"][start:stop] = total
+        columns["Benchmark Max Drawdown"][start:stop] = drawdown
+
+    return pd.DataFrame(columns)
+
+
+def summarize_paths(paths):
+    """
+    Percentiles of every column of bootstrap_returns plus the odds that
+    matter: losing money and beating the benchmark.
+
+    Returns:
+    - summary: DataFrame (percentile rows x metric columns).
+    - odds: Dict of probabilities.
+    """
+    summary = paths.quantile([p / 100 for p in PERCENTILES])
+    summary.index = [f"P{p}" for p in PERCENTILES]
+    odds = {
+        "Probability of Loss": float((paths["Total Return"] < 0).mean()),
+        "Probability of Beating Benchmark": float((paths["Total Return"] > paths["Benchmark Return"]).mean()),
+    }
+    return summary, odds
+
+
+def monte_carlo(hist, n_paths=N_PATHS, block_size=BLOCK_SIZE, seed=None):
+    """
+    bootstrap_returns and summarize_paths for a backtest hist with
+    'Strategy_Returns' and 'Returns' columns.
+    """
+    paths = bootstrap_returns(hist["Strategy_Returns"], hist["Returns"], n_paths, block_size, seed)
+    summary, odds = summarize_paths(paths)
+    return {"paths": paths, "summary": summary, "odds": odds}
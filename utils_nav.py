@@ -0,0 +1,154 @@
+import numpy as np
+import pandas as pd
+from utils_barstore import get_close_panel
+from utils_metrics import periods_per_year
+
+
+# Daily valuation of the portfolio from its buy and sell transactions. Trades
+# are pivoted to a (dates x tickers) panel of signed quantities, cumulated into
+# holdings and multiplied by the close panel, so the whole history is a few
+# array operations however many years and trades it covers.
+#
+# Bought shares are money put into the portfolio and sold shares money taken
+# out, both at the trade price. The time-weighted return strips these flows
+# out: each day's P/L is divided by the capital at work that day (the previous
+# close value plus the day's purchases).
+#
+# Each stock exchange is valued on its own: SGX positions are priced in SGD
+# and NYSE positions in USD, so their values are never added together.
+
+# Shortest bar store period covering a history of this many years
+_PERIODS = [(1, "1y"), (2, "2y"), (5, "5y"), (10, "10y")]
+
+
+def history_period(start, today=None):
+    """
+    Smallest yfinance style period that reaches back to start.
+    """
+    today = pd.Timestamp.today().normalize() if today is None else today
+    years = (today - start) / pd.Timedelta(days=365.25)
+    for limit, period in _PERIODS:
+        if years < limit:
+            return period
+    return "max"
+
+
+def transaction_table(buy_df, sell_df):
+    """
+    Buys and sells as one table of 'Date', 'Ticker', 'Quantity' (negative for
+    sells, as stored), 'Price' and 'Stock Exchange', sorted by date.
+    """
+    buys = pd.DataFrame({"Date": pd.to_datetime(buy_df["Buy Date"]), "Ticker": buy_df["Ticker"],
+                         "Quantity": buy_df["Quantity"].astype(float), "Price": buy_df["Buy Price"].astype(float),
+                         "Stock Exchange": buy_df["Stock Exchange"]})
+    sells = pd.DataFrame({"Date": pd.to_datetime(sell_df["Sell Date"]), "Ticker": sell_df["Ticker"],
+                          "Quantity": sell_df["Quantity"].astype(float), "Price": sell_df["Sell Price"].astype(float),
+                          "Stock Exchange": sell_df["Stock Exchange"]})
+    frames = [frame for frame in (buys, sells) if not frame.empty]
+    trades = pd.concat(frames, ignore_index=True) if frames else buys
+    return trades.sort_values("Date", kind="stable", ignore_index=True)
+
+
+def portfolio_nav(trades, close):
+    """
+    Daily valuation of a portfolio, all of its tickers in one currency.
+
+    Parameters:
+    - trades: Output of transaction_table.
+    - close: Close panel (dates x tickers) on a tz-naive DatetimeIndex, e.g.
+      from get_close_panel. Tickers without closes are valued at their last
+      trade price.
+
+    Returns:
+    - Dict with:
+      - 'nav': DataFrame per day of 'Market Value', 'Net Flow' (money put in,
+        negative when taken out), 'P/L', 'Daily Return', 'TWR' (growth of 1,
+        time-weighted) and 'Drawdown'.
+      - 'holdings': DataFrame of shares held per ticker.
+      - 'contribution': DataFrame per ticker of 'P/L' and 'Return
+        Contribution' (its share of the daily returns, summed).
+      - 'metrics': Dict of return and drawdown metrics.
+    """
+    start = trades["Date"].min()
+    dates = close.index[close.index >= start].union(pd.DatetimeIndex(trades["Date"].unique()))
+    tickers = list(dict.fromkeys(trades["Ticker"]))
+
+    # several trades of a ticker on one day net into one cell
+    quantity = trades.pivot_table(index="Date", columns="Ticker", values="Quantity", aggfunc="sum")
+    quantity = quantity.reindex(index=dates, columns=tickers).fillna(0.0)
+    trade_value = (trades["Quantity"] * trades["Price"]).groupby([trades["Date"], trades["Ticker"]]).sum()
+    trade_value = trade_value.unstack().reindex(index=dates, columns=tickers).fillna(0.0)
+
+    # closes carried over holidays; trade prices stand in where there is no close
+    last_trade_price = trades.groupby(["Date", "Ticker"])["Price"].last().unstack()
+    prices = close.reindex(columns=tickers).reindex(dates).combine_first(
+        last_trade_price.reindex(index=dates, columns=tickers)).ffill()
+
+    holdings = quantity.cumsum()
+    value = (holdings * prices).fillna(0.0)
+
+    # P/L of a day: yesterday's holdings repriced plus today's trades marked to the close
+    ticker_pnl = value - value.shift(1).fillna(0.0) - trade_value
+    flow = trade_value.sum(axis=1)
+    market_value = value.sum(axis=1)
+    pnl = ticker_pnl.sum(axis=1)
+
+    capital = market_value.shift(1).fillna(0.0) + flow.clip(lower=0)
+    capital = capital.where(capital > 0)
+    daily_return = (pnl / capital).fillna(0.0)
+    contribution = ticker_pnl.div(capital, axis=0).fillna(0.0)
+
+    twr = (1 + daily_return).cumprod()
+    drawdown = twr / twr.cummax() - 1
+
+    nav = pd.DataFrame({
+        "Market Value": market_value,
+        "Net Flow": flow,
+        "P/L": pnl,
+        "Daily Return": daily_return,
+        "TWR": twr,
+        "Drawdown": drawdown,
+    })
+
+    per_year = periods_per_year(dates)
+    years = np.nan if np.isnan(per_year) else (len(dates) - 1) / per_year
+    with np.errstate(invalid="ignore", divide="ignore"):
+        metrics = {
+            "Time-Weighted Return": twr.iloc[-1] - 1,
+            "Annualized Return": twr.iloc[-1] ** (1 / years) - 1 if years > 0 else np.nan,
+            "Annualized Volatility": daily_return.std() * np.sqrt(per_year),
+            "Max Drawdown": drawdown.min(),
+            "Total P/L": pnl.sum(),
+            "Net Invested": flow.sum(),
+            "Market Value": market_value.iloc[-1],
+        }
+    metrics = {name: float(value) for name, value in metrics.items()}
+
+    contribution = pd.DataFrame({"P/L": ticker_pnl.sum(), "Return Contribution": contribution.sum()})
+    return {
+        "nav": nav,
+        "holdings": holdings,
+        "contribution": contribution.sort_values("Return Contribution", ascending=False),
+        "metrics": metrics,
+    }
+
+
+def get_portfolio_navs(buy_df, sell_df):
+    """
+    portfolio_nav of the transactions of each stock exchange, with closes
+    from the bar store.
+
+    Returns:
+    - Dict of stock exchange -> portfolio_nav result, in the currency of
+      that exchange. Empty when there are no transactions.
+    """
+    trades = transaction_table(buy_df, sell_df).dropna(subset=["Date", "Quantity", "Price"])
+    if trades.empty:
+        return {}
+    # a ticker belongs to the exchange it was bought on, as in the portfolio summary
+    exchanges = trades.groupby("Ticker")["Stock Exchange"].transform("first").fillna("N/A")
+    tickers = list(dict.fromkeys(trades["Ticker"]))
+    close = get_close_panel(tickers, history_period(trades["Date"].min()))
+    if close.empty:
+        close = pd.DataFrame(index=pd.DatetimeIndex([]))
+    return {exchange: portfolio_nav(group, close) for exchange, group in trades.groupby(exchanges, sort=False)}
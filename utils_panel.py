@@ -0,0 +1,284 @@
+import numpy as np
+import pandas as pd
+from utils_barstore import get_histories
+from utils_indicators import indicator_graph
+from utils_metrics import backtest_report
+from utils_resultcache import result_cache, result_key
+
+
+# Vectorized panel backtest: N tickers are laid out as columns of 2-D arrays
+# (bars x symbols) and every indicator, signal, position, return and metric
+# is computed for all of them in one pass.
+#
+# Columns are right-aligned on each ticker's own trading bars (the last bar of
+# every ticker sits in the last row, shorter histories are NaN padded at the
+# top). Rolling windows therefore run over each ticker's own bars, even when
+# SGX and NYSE holidays differ.
+
+STRATEGIES = ["Moving Average Crossover", "Bollinger Bands", "MACD", "RSI"]
+
+# Parameters each strategy needs (same names as strategy_params in utils_backtest)
+REQUIRED_PARAMS = {
+    "Moving Average Crossover": ["sma_period", "ema_period"],
+    "Bollinger Bands": ["bb_period", "bb_std"],
+    "MACD": ["macd_fast", "macd_slow", "macd_signal"],
+    "RSI": ["rsi_period"],
+}
+
+RSI_OVERSOLD = 30
+RSI_OVERBOUGHT = 70
+
+
+def align_closes(histories):
+    """
+    Right-align the closing prices of several tickers into one frame.
+
+    Parameters:
+    - histories: Dict of symbol -> OHLCV DataFrame (empty frames are skipped).
+
+    Returns:
+    - close: DataFrame (bars x symbols) on a RangeIndex, NaN padded at the top.
+    - dates: Dict of symbol -> DatetimeIndex of that ticker's own bars.
+    """
+    histories = {s: h for s, h in histories.items() if h is not None and not h.empty}
+    length = max((len(h) for h in histories.values()), default=0)
+    values = np.full((length, len(histories)), np.nan)
+    dates = {}
+    for j, (symbol, hist) in enumerate(histories.items()):
+        values[length - len(hist):, j] = hist["Close"].to_numpy(dtype=float)
+        dates[symbol] = hist.index
+    return pd.DataFrame(values, columns=list(histories)), dates
+
+
+def compute_indicators(close, strategy, params):
+    """
+    Indicators of a strategy for every column of the close panel, from the
+    shared indicator graph.
+
+    Returns:
+    - Dict of indicator name (column names used by utils_backtest) -> DataFrame.
+    """
+    return indicator_graph.strategy_indicators(close, tuple(close.columns), strategy, params)
+
+
+def compute_signals(close, indicators, strategy, params):
+    """
+    Signal array (bars x symbols): 1.0 buy/hold, -1.0 sell, 0.0 flat,
+    NaN before a ticker's first bar.
+    """
+    valid = ~np.isnan(close.to_numpy())
+
+    if strategy == STRATEGIES[0]:
+        ema, sma = indicators["EMA"].to_numpy(), indicators["SMA"].to_numpy()
+        # no signal before bar number sma_period
+        bar_number = np.cumsum(valid, axis=0) - 1
+        signal = np.where((ema > sma) & (bar_number >= params["sma_period"]), 1.0, 0.0)
+
+    elif strategy == STRATEGIES[1]:
+        price = close.to_numpy()
+        signal = np.where(price < indicators["Lower_Band"].to_numpy(), 1.0, 0.0)
+        signal = np.where(price > indicators["Upper_Band"].to_numpy(), -1.0, signal)
+
+    elif strategy == STRATEGIES[2]:
+        macd, line = indicators["MACD"].to_numpy(), indicators["Signal_Line"].to_numpy()
+        signal = np.where(macd > line, 1.0, np.where(macd < line, -1.0, 0.0))
+
+    elif strategy == STRATEGIES[3]:
+        rsi = indicators["RSI"].to_numpy()
+        signal = np.where(rsi < RSI_OVERSOLD, 1.0, np.where(rsi > RSI_OVERBOUGHT, -1.0, 0.0))
+
+    else:
+        raise ValueError(f"Invalid strategy selected: {strategy}")
+
+    return np.where(valid, signal, np.nan)
+
+
+def _shift(values):
+    # shift down one bar along the time axis
+    shifted = np.empty_like(values)
+    shifted[0] = np.nan
+    shifted[1:] = values[:-1]
+    return shifted
+
+
+def backtest_arrays(close, signal):
+    """
+    Returns, strategy returns, cumulative curves and performance metrics for
+    every column at once.
+
+    Parameters:
+    - close: 2-D array (bars x symbols) of closing prices.
+    - signal: 2-D array of the same shape from compute_signals.
+
+    Returns:
+    - Dict of 2-D arrays ('Position', 'Returns', 'Strategy_Returns',
+      'Cumulative_Returns', 'Cumulative_Benchmark_Returns') and 1-D metric
+      arrays ('total_return', 'benchmark_return', 'num_trades', 'win_rate',
+      'avg_profit', 'avg_loss').
+    """
+    valid = ~np.isnan(close)
+    position = signal - _shift(signal)
+    returns = close / _shift(close) - 1
+    strategy_returns = returns * _shift(signal)
+
+    # cumulative products skip missing bars like pandas cumprod
+    cumulative = np.cumprod(np.where(np.isnan(strategy_returns), 1.0, 1 + strategy_returns), axis=0)
+    cumulative[np.isnan(strategy_returns)] = np.nan
+    benchmark = np.cumprod(np.where(np.isnan(returns), 1.0, 1 + returns), axis=0)
+    benchmark[np.isnan(returns)] = np.nan
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wins = (strategy_returns > 0)
+        losses = (strategy_returns < 0)
+        # a missing return counts as a non-zero day
+        active = valid & (strategy_returns != 0)
+        win_rate = wins.sum(axis=0) / active.sum(axis=0)
+        avg_profit = np.where(wins, strategy_returns, 0).sum(axis=0) / wins.sum(axis=0)
+        avg_loss = np.where(losses, strategy_returns, 0).sum(axis=0) / losses.sum(axis=0)
+
+    return {
+        "Position": position,
+        "Returns": returns,
+        "Strategy_Returns": strategy_returns,
+        "Cumulative_Returns": cumulative,
+        "Cumulative_Benchmark_Returns": benchmark,
+        "total_return": cumulative[-1] - 1 if len(cumulative) else np.array([]),
+        "benchmark_return": benchmark[-1] - 1 if len(benchmark) else np.array([]),
+        "num_trades": np.nansum(np.abs(position), axis=0) / 2,
+        "win_rate": win_rate,
+        "avg_profit": avg_profit,
+        "avg_loss": avg_loss,
+    }
+
+
+def check_params(strategy, params):
+    if strategy not in REQUIRED_PARAMS:
+        raise ValueError("Invalid strategy selected.")
+    missing = [name for name in REQUIRED_PARAMS[strategy] if params.get(name) is None]
+    if missing:
+        raise ValueError(f"{strategy} needs {', '.join(missing)} to be specified.")
+
+
+class PanelBacktest:
+    """
+    Result of one vectorized backtest over several tickers.
+
+    Attributes:
+    - symbols: Tickers that could be backtested, in column order.
+    - errors: Dict of ticker -> reason it was skipped.
+    - metrics: DataFrame with one row of performance metrics per ticker.
+    """
+
+    METRIC_COLUMNS = {
+        "total_return": "Total Return",
+        "benchmark_return": "Benchmark Return",
+        "num_trades": "Total Trades",
+        "win_rate": "Win Rate",
+        "avg_profit": "Average Profit",
+        "avg_loss": "Average Loss",
+    }
+
+    def __init__(self, histories, strategy, params):
+        check_params(strategy, params)
+        self.strategy = strategy
+        self.params = params
+        self.errors = {}
+
+        usable = {}
+        min_bars = max(params.get(name) or 0 for name in REQUIRED_PARAMS[strategy]
+                       if name != "bb_std")
+        for symbol, hist in histories.items():
+            if hist is None or hist.empty:
+                self.errors[symbol] = f"No data found for {symbol} over the specified period."
+            elif strategy == STRATEGIES[0] and len(hist) < min_bars:
+                self.errors[symbol] = (f"Not enough data to calculate {params['sma_period']}-day SMA "
+                                       f"or {params['ema_period']}-day EMA for {symbol}.")
+            else:
+                usable[symbol] = hist
+
+        self._histories = usable
+        self.close, self.dates = align_closes(usable)
+        self.symbols = list(self.close.columns)
+        self.indicators = compute_indicators(self.close, strategy, params)
+        self.signal = compute_signals(self.close, self.indicators, strategy, params)
+        self.results = backtest_arrays(self.close.to_numpy(), self.signal)
+
+        self.metrics = pd.DataFrame(
+            {label: self.results[key] for key, label in self.METRIC_COLUMNS.items()},
+            index=pd.Index(self.symbols, name="Ticker"),
+        )
+
+    def metric_values(self, symbol):
+        # metrics of one ticker as keyword arguments for format_performance_metrics
+        j = self.symbols.index(symbol)
+        return {key: float(self.results[key][j]) for key in self.METRIC_COLUMNS}
+
+    def hist(self, symbol):
+        """
+        The ticker's bars with its indicator, signal and return columns, for
+        the plot_* functions.
+        """
+        j = self.symbols.index(symbol)
+        hist = self._histories[symbol].copy()
+        rows = slice(len(self.close) - len(hist), None)
+
+        for name, frame in self.indicators.items():
+            hist[name] = frame.iloc[rows, j].to_numpy()
+        hist["Signal"] = self.signal[rows, j]
+        for name in ["Position", "Returns", "Strategy_Returns",
+                     "Cumulative_Returns", "Cumulative_Benchmark_Returns"]:
+            hist[name] = self.results[name][rows, j]
+        return hist
+
+
+def run_panel_backtest(tickers, period, strategy, params):
+    """
+    Fetch the bars of every ticker from the bar store and backtest them in one pass.
+
+    Parameters:
+    - tickers: List of ticker symbols.
+    - period: yfinance style period ('6mo', '1y', ...).
+    - strategy: One of STRATEGIES.
+    - params: Dict with the strategy parameters (sma_period, ema_period, bb_period,
+      bb_std, macd_fast, macd_slow, macd_signal, rsi_period).
+    """
+    histories = get_histories(tickers, period)
+    return PanelBacktest({ticker: histories.get(ticker) for ticker in tickers}, strategy, params)
+
+
+def run_cached_backtests(tickers, period, strategy, params, interval="1d"):
+    """
+    Backtest results per ticker, served from the result cache when the same
+    backtest already ran on the same bars; the misses run as one panel.
+
+    Returns:
+    - results: Dict of ticker -> {'hist': backtest columns as PanelBacktest.hist,
+      'metrics': metric_values, 'report': utils_metrics.backtest_report}.
+      hist.attrs['cache_key'] identifies the result.
+    - errors: Dict of ticker -> reason it was skipped.
+    """
+    check_params(strategy, params)
+    params = {name: params[name] for name in REQUIRED_PARAMS[strategy]}
+    histories = get_histories(tickers, period, interval)
+
+    results, keys, misses = {}, {}, {}
+    for ticker in tickers:
+        hist = histories.get(ticker)
+        keys[ticker] = key = None if hist is None else result_key(ticker, period, interval, strategy, params, hist)
+        cached = result_cache.get(key)
+        if cached is not None:
+            results[ticker] = cached
+        else:
+            misses[ticker] = hist
+
+    if not misses:
+        return results, {}
+
+    panel = PanelBacktest(misses, strategy, params)
+    for ticker in panel.symbols:
+        hist = panel.hist(ticker)
+        hist.attrs["cache_key"] = keys[ticker]
+        results[ticker] = {"hist": hist, "metrics": panel.metric_values(ticker), "report": backtest_report(hist)}
+        result_cache.set(keys[ticker], results[ticker])
+
+    return results, panel.errors
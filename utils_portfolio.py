@@ -1,7 +1,208 @@
+import time
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, date
+from utils_barstore import get_histories
+from utils_fundamentals import get_infos
+from utils_actions import get_dividends_batch
+from utils_nav import transaction_table
+
+
+# The summary is built with groupby/merge over the transaction tables: every
+# ticker's quantities, average cost and P/L come out of one pass, and the
+# prices, dividends and industries of all tickers are fetched in one batch
+# each instead of one request per ticker.
+#
+# The summary in session state is kept as a table keyed by ticker: an update
+# recomputes only the tickers whose transactions changed (or whose market data
+# is older than SUMMARY_TTL) and keeps every other row as it is.
+
+SUMMARY_COLUMNS = ['Ticker', 'Last Closing Price', 'Balance Quantity', 'Average Buy Price', 'Unrealized P/L',
+                   'Realized P/L', 'Total Return', 'Total Dividends', 'Industry', 'Stock Exchange']
+
+# Seconds a summary row's price and dividends are reused before a refetch,
+# matching the bar store's refresh of daily bars
+SUMMARY_TTL = 15 * 60
+
+
+def portfolio_positions(buy_df, sell_df):
+    """
+    Quantities, average buy price, realized P/L and stock exchange per ticker.
+
+    Parameters:
+    - buy_df: Buy transactions ('Ticker', 'Quantity', 'Buy Price', 'Stock Exchange').
+    - sell_df: Sell transactions ('Ticker', 'Quantity' stored negative, 'Sell Price').
+
+    Returns:
+    - DataFrame indexed by ticker (buy tickers first, in order of appearance)
+      with 'Total Bought', 'Total Sold', 'Balance Quantity', 'Average Buy Price',
+      'Realized P/L' and 'Stock Exchange'.
+    """
+    buys = buy_df.assign(Cost=buy_df['Quantity'] * buy_df['Buy Price'])
+    bought = buys.groupby('Ticker', sort=False).agg(
+        **{'Total Bought': ('Quantity', 'sum'), 'Cost': ('Cost', 'sum'),
+           'Stock Exchange': ('Stock Exchange', 'first')})
+
+    # sell quantities are negative, proceeds are counted positive
+    sells = sell_df.assign(Sold=-sell_df['Quantity'], Proceeds=-sell_df['Quantity'] * sell_df['Sell Price'])
+    sold = sells.groupby('Ticker', sort=False).agg(
+        **{'Total Sold': ('Sold', 'sum'), 'Proceeds': ('Proceeds', 'sum')})
+
+    positions = bought.join(sold, how='outer', sort=False)
+    positions = positions.reindex(list(dict.fromkeys([*bought.index, *sold.index])))
+    positions[['Total Bought', 'Cost', 'Total Sold', 'Proceeds']] = (
+        positions[['Total Bought', 'Cost', 'Total Sold', 'Proceeds']].fillna(0))
+    positions['Stock Exchange'] = positions['Stock Exchange'].fillna('N/A')
+
+    total_bought = positions['Total Bought']
+    positions['Balance Quantity'] = total_bought - positions['Total Sold']
+    positions['Average Buy Price'] = (positions['Cost'] / total_bought).where(total_bought > 0, 0.0)
+    positions['Realized P/L'] = positions['Proceeds'] - positions['Total Sold'] * positions['Average Buy Price']
+    positions.index.name = 'Ticker'
+    return positions.drop(columns=['Cost', 'Proceeds'])
+
+
+def investment_by_exchange(buy_df):
+    """
+    Total amount invested (quantity x buy price) per stock exchange.
+    """
+    cost = buy_df['Quantity'] * buy_df['Buy Price']
+    return cost.groupby(buy_df['Stock Exchange']).sum().reset_index(name='Total Investment')
+
+
+def last_closing_prices(tickers):
+    """
+    Latest close of each ticker from one batched bar store sync, 0 when
+    no data is available.
+    """
+    try:
+        histories = get_histories(tickers, "1d")
+    except Exception as e:
+        print(f"Could not fetch prices: {e}")
+        histories = {}
+    prices = {}
+    for ticker in tickers:
+        hist = histories.get(ticker)
+        prices[ticker] = float(hist['Close'].iloc[-1]) if hist is not None and not hist.empty else 0.0
+    return pd.Series(prices, dtype=float)
+
+
+def dividend_accruals(trades, dividends):
+    """
+    Dividends earned on each ex-date from the shares held going into it.
+
+    Every ex-date is matched to the ticker's net holding after its last trade
+    strictly before the ex-date (merge_asof over date-sorted tables), so
+    shares bought on the ex-date earn nothing, shares sold on or after it
+    still do, and partial sells reduce the holding they apply to.
+
+    Parameters:
+    - trades: Table of 'Date', 'Ticker' and signed 'Quantity' (see
+      utils_nav.transaction_table).
+    - dividends: Dict of ticker -> Series of dividend per share by ex-date.
+
+    Returns:
+    - DataFrame of 'Ticker', 'Ex-Date', 'Dividend', 'Shares Held' and
+      'Amount', one row per ex-date of each ticker.
+    """
+    columns = ['Ticker', 'Ex-Date', 'Dividend', 'Shares Held', 'Amount']
+    frames = []
+    for ticker, series in dividends.items():
+        if series is None or series.empty or not isinstance(series.index, pd.DatetimeIndex):
+            continue
+        index = series.index.tz_localize(None) if series.index.tz is not None else series.index
+        frames.append(pd.DataFrame({'Ticker': ticker, 'Ex-Date': index.as_unit('ns'),
+                                    'Dividend': series.to_numpy(dtype=float)}))
+    if not frames or trades.empty:
+        return pd.DataFrame(columns=columns)
+    ex_dates = pd.concat(frames, ignore_index=True).sort_values('Ex-Date', kind='stable')
+
+    holdings = trades[['Date', 'Ticker', 'Quantity']].sort_values('Date', kind='stable')
+    holdings = holdings.assign(Date=holdings['Date'].astype('datetime64[ns]'),
+                               **{'Shares Held': holdings.groupby('Ticker')['Quantity'].cumsum()})
+
+    accruals = pd.merge_asof(ex_dates, holdings[['Date', 'Ticker', 'Shares Held']], left_on='Ex-Date',
+                             right_on='Date', by='Ticker', allow_exact_matches=False)
+    # no trade before the ex-date, or more sold than bought: nothing held
+    accruals['Shares Held'] = accruals['Shares Held'].fillna(0.0).clip(lower=0)
+    accruals['Amount'] = accruals['Shares Held'] * accruals['Dividend']
+    return accruals[columns]
+
+
+def dividends_received(buy_df, sell_df, tickers):
+    """
+    Dividends received per ticker, from one batched corporate actions fetch.
+    """
+    try:
+        dividends = get_dividends_batch(tickers)
+    except Exception as e:
+        print(f"Could not fetch dividends: {e}")
+        dividends = {}
+    trades = transaction_table(buy_df, sell_df).dropna(subset=['Date', 'Quantity'])
+    accruals = dividend_accruals(trades, dividends)
+    return accruals.groupby('Ticker')['Amount'].sum().reindex(tickers, fill_value=0.0).astype(float)
+
+
+def compute_portfolio_summary(buy_df, sell_df, tickers=None):
+    """
+    Portfolio summary of the transaction tables.
+
+    Parameters:
+    - tickers: Only summarize these tickers, all tickers when omitted.
+
+    Returns:
+    - summary: DataFrame with SUMMARY_COLUMNS, one row per ticker.
+    - total_investment_by_exchange: DataFrame of 'Stock Exchange' and 'Total Investment'.
+    """
+    total_investment_by_exchange = investment_by_exchange(buy_df)
+    if tickers is not None:
+        buy_df = buy_df[buy_df['Ticker'].isin(tickers)]
+        sell_df = sell_df[sell_df['Ticker'].isin(tickers)]
+
+    positions = portfolio_positions(buy_df, sell_df)
+    tickers = positions.index.tolist()
+    if not tickers:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS), total_investment_by_exchange
+
+    infos = get_infos(tickers)
+    positions['Last Closing Price'] = last_closing_prices(tickers)
+    positions['Total Dividends'] = dividends_received(buy_df, sell_df, tickers)
+    positions['Industry'] = [infos.get(ticker, {}).get('industry', 'N/A') for ticker in tickers]
+
+    held = positions['Balance Quantity'] > 0
+    positions['Unrealized P/L'] = (positions['Balance Quantity'] *
+                                   (positions['Last Closing Price'] - positions['Average Buy Price'])).where(held, 0.0)
+    invested = positions['Average Buy Price'] * positions['Total Bought']
+    positions['Total Return'] = ((positions['Realized P/L'] + positions['Unrealized P/L'] + positions['Total Dividends'])
+                                 / invested * 100).where(positions['Total Bought'] > 0, 0.0)
+
+    return positions.reset_index()[SUMMARY_COLUMNS], total_investment_by_exchange
+
+
+def transaction_fingerprints(buy_df, sell_df):
+    """
+    Dict of ticker -> fingerprint of its buy and sell rows; it changes
+    whenever one of the ticker's transactions is added, edited or removed.
+    """
+    def by_ticker(df):
+        if df.empty:
+            return {}
+        hashes = pd.util.hash_pandas_object(df, index=False)
+        return {ticker: hash(tuple(h)) for ticker, h in hashes.groupby(df['Ticker'].to_numpy(), sort=False)}
+
+    buys, sells = by_ticker(buy_df), by_ticker(sell_df)
+    return {ticker: (buys.get(ticker), sells.get(ticker)) for ticker in dict.fromkeys([*buys, *sells])}
+
+
+def stale_tickers(fingerprints, state, now=None):
+    """
+    Tickers whose summary row must be recomputed: new or changed
+    transactions, or market data older than SUMMARY_TTL.
+    """
+    now = time.time() if now is None else now
+    return [ticker for ticker, fingerprint in fingerprints.items()
+            if state.get(ticker) is None
+            or state[ticker][0] != fingerprint
+            or now - state[ticker][1] > SUMMARY_TTL]
 
 
 # Function to update portfolio summary
@@ -9,87 +210,28 @@ def update_portfolio_summary():
     buy_df = st.session_state.buy_transactions
     sell_df = st.session_state.sell_transactions
 
-    summary = []
-    tickers = set(buy_df['Ticker']).union(sell_df['Ticker'])
-    for ticker in tickers:
-        buy_data = buy_df[buy_df['Ticker'] == ticker]
-        sell_data = sell_df[sell_df['Ticker'] == ticker]
-
-        total_bought = buy_data['Quantity'].sum()
-        total_sold = -sell_data['Quantity'].sum()  # Convert sell quantity to negative
-        balance_quantity = total_bought - total_sold  # Adjusted for negative sell quantity
-
-        avg_buy_price = (buy_data['Quantity'] * buy_data['Buy Price']).sum() / total_bought if total_bought > 0 else 0
-
-        # Fetch the latest price
-        try:
-            last_close_price = yf.Ticker(ticker).history(period="1d")['Close'].iloc[-1]
-        except:
-            last_close_price = 0  # Fallback if data unavailable
-
-        unrealized_pnl = balance_quantity * (last_close_price - avg_buy_price) if balance_quantity > 0 else 0
-        realized_pnl = (-sell_data['Quantity'] * (sell_data['Sell Price'] - avg_buy_price)).sum() if not sell_data.empty else 0  # Adjusted for negative sell quantity
-
-        # Calculate total dividends
-        ticker_obj = yf.Ticker(ticker)
-        dividends = ticker_obj.dividends
-
-        # Ensure index is DatetimeIndex and remove timezone if present
-        if not dividends.empty and isinstance(dividends.index, pd.DatetimeIndex):
-            if dividends.index.tz is not None:
-                dividends.index = dividends.index.tz_localize(None)
-
-            total_dividends = 0.0
-            for index, row in buy_data.iterrows():
-                buy_date = pd.Timestamp(row['Buy Date'])
-                sell_date = datetime.now()
-
-                sell_transaction = sell_data[
-                    (sell_data['Quantity'] == -row['Quantity']) &
-                    (pd.to_datetime(sell_data['Sell Date']) > buy_date)
-                ]
-                if not sell_transaction.empty:
-                    sell_date = pd.Timestamp(sell_transaction['Sell Date'].iloc[0])
-
-                quantity = row['Quantity']
-
-                # ✅ Safe filtering
-                filtered_dividends = dividends[
-                    (dividends.index >= buy_date) & (dividends.index < sell_date)
-                ]
-
-            total_dividends += filtered_dividends.sum() * quantity
-        else:
-            total_dividends = 0.0
-
-
-        total_return = ((realized_pnl + unrealized_pnl + total_dividends) / (avg_buy_price * total_bought)) * 100 if total_bought > 0 else 0
-
-        # Fetch industry information
-        try:
-            industry = ticker_obj.info.get('industry', 'N/A')
-        except:
-            industry = 'N/A'  # Fallback if data unavailable
-
-         # Fetch stock exchange information
-        stock_exchange = buy_data['Stock Exchange'].iloc[0] if not buy_data.empty else 'N/A'
-
-           # Calculate total investment by stock exchange
-        total_investment_by_exchange = buy_df.groupby('Stock Exchange').apply(
-            lambda x: (x['Quantity'] * x['Buy Price']).sum()).reset_index(name='Total Investment')
-        st.session_state.total_investment_by_exchange = total_investment_by_exchange
-        
-        summary.append({
-            'Ticker': ticker,
-            'Last Closing Price': last_close_price,
-            'Balance Quantity': balance_quantity,
-            'Average Buy Price': avg_buy_price,
-            'Unrealized P/L': unrealized_pnl,
-            'Realized P/L': realized_pnl,
-            'Total Return': total_return,
-            'Total Dividends': total_dividends,
-            'Industry': industry , # Add industry information
-            'Stock Exchange': stock_exchange
-        })
-
-    st.session_state.portfolio_summary = pd.DataFrame(summary)
\ No newline at end of file
+    # ticker -> (fingerprint, computed at) of the rows in portfolio_summary
+    state = st.session_state.get('portfolio_summary_state', {})
+    table = st.session_state.get('portfolio_summary')
+    if table is None or not state:
+        table, state = pd.DataFrame(columns=SUMMARY_COLUMNS), {}
+
+    fingerprints = transaction_fingerprints(buy_df, sell_df)
+    changed = stale_tickers(fingerprints, state)
+
+    rows, total_investment_by_exchange = compute_portfolio_summary(buy_df, sell_df, changed) if changed else (
+        None, investment_by_exchange(buy_df))
+
+    now = time.time()
+    state = {ticker: (fingerprints[ticker], now) if ticker in changed else state[ticker] for ticker in fingerprints}
+    table = table.set_index('Ticker')
+    if rows is not None and not rows.empty:
+        kept = table.drop(index=rows['Ticker'], errors='ignore')
+        rows = rows.set_index('Ticker')
+        table = pd.concat([kept, rows]) if not kept.empty else rows
+    # keep the order of the transaction tables, dropping tickers without transactions
+    table = table.loc[[ticker for ticker in fingerprints if ticker in table.index]]
+
+    st.session_state.portfolio_summary = table.reset_index()[SUMMARY_COLUMNS]
+    st.session_state.portfolio_summary_state = state
+    st.session_state.total_investment_by_exchange = total_investment_by_exchange
@@ -0,0 +1,313 @@
+import os
+import re
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+import pandas as pd
+import yfinance as yf
+from utils_cache import SingleFlight
+from utils_scheduler import get_scheduler
+
+
+# Select the market data backend without touching the pages:
+#   EQUITYVISION_PROVIDER=yfinance (default) | record | replay
+#   EQUITYVISION_RECORDINGS=<folder holding the recorded responses>
+PROVIDER_ENV = "EQUITYVISION_PROVIDER"
+RECORDINGS_ENV = "EQUITYVISION_RECORDINGS"
+DEFAULT_RECORDINGS = Path("./recordings")
+
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_start(period, now=None):
+    """
+    Earliest (naive) timestamp needed to serve a yfinance style period,
+    None for the full history.
+    """
+    now = now or pd.Timestamp.now()
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return pd.Timestamp(now.year, 1, 1)
+
+    match = _PERIOD_RE.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+    n, unit = int(match.group(1)), match.group(2)
+
+    if unit == "d":
+        # 'Nd' means N trading sessions, pad for weekends and holidays
+        offset = pd.Timedelta(days=n + n // 2 + 4)
+    elif unit == "wk":
+        offset = pd.DateOffset(weeks=n)
+    elif unit == "mo":
+        offset = pd.DateOffset(months=n)
+    else:
+        offset = pd.DateOffset(years=n)
+    return (now - offset).normalize()
+
+
+class MarketDataProvider:
+    """
+    Interface for a market data backend. Every page and utility reads
+    prices and fundamentals through get_provider() rather than yfinance.
+    """
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        # OHLCV bars with Dividends / Stock Splits columns, like Ticker.history
+        raise NotImplementedError
+
+    def info(self, symbol):
+        # dictionary like Ticker.info
+        raise NotImplementedError
+
+    def dividends(self, symbol):
+        # Series of dividend amounts indexed by ex-date
+        raise NotImplementedError
+
+    def actions(self, symbol):
+        # DataFrame of Dividends and Stock Splits indexed by date, like Ticker.actions
+        raise NotImplementedError
+
+    def recommendations(self, symbol):
+        # DataFrame like Ticker.get_recommendations_summary()
+        raise NotImplementedError
+
+    def calendar(self, symbol):
+        # dictionary like Ticker.get_calendar()
+        raise NotImplementedError
+
+    def upgrades_downgrades(self, symbol):
+        # DataFrame of analyst rating changes, like Ticker.get_upgrades_downgrades()
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Live data from Yahoo Finance."""
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=start, interval=interval, auto_adjust=True, actions=True)
+        return ticker.history(period=period or "max", interval=interval, auto_adjust=True, actions=True)
+
+    def info(self, symbol):
+        return yf.Ticker(symbol).info or {}
+
+    def dividends(self, symbol):
+        return yf.Ticker(symbol).dividends
+
+    def actions(self, symbol):
+        return yf.Ticker(symbol).actions
+
+    def recommendations(self, symbol):
+        return yf.Ticker(symbol).get_recommendations_summary()
+
+    def calendar(self, symbol):
+        return yf.Ticker(symbol).get_calendar()
+
+    def upgrades_downgrades(self, symbol):
+        return yf.Ticker(symbol).get_upgrades_downgrades()
+
+
+class RecordReplayProvider(MarketDataProvider):
+    """
+    Offline backend backed by local pickle files.
+
+    In "record" mode every call is forwarded to the upstream provider and the
+    response is written under root; in "replay" mode responses are read back
+    from root only, so pages and benchmarks run deterministically without
+    network. History is recorded as one merged series per (symbol, interval)
+    and replayed by filtering it, so replays work whatever start the caller asks for.
+
+    Parameters:
+    - root: Folder holding the recordings.
+    - mode: "record" or "replay".
+    - upstream: Provider used while recording (defaults to YFinanceProvider).
+    """
+
+    def __init__(self, root=DEFAULT_RECORDINGS, mode="replay", upstream=None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown record/replay mode: {mode}")
+        self.root = Path(root)
+        self.mode = mode
+        self.upstream = upstream or YFinanceProvider()
+        self._lock = threading.Lock()
+
+    def _path(self, kind, *key):
+        name = "_".join(str(part) for part in key)
+        # symbols such as ^DJI or CL=F stay readable, anything else is hashed
+        if not re.fullmatch(r"[\w.^=\-]+", name):
+            name = hashlib.sha1(name.encode()).hexdigest()
+        return self.root / kind / f"{name}.pkl"
+
+    def _read(self, path):
+        if not path.exists():
+            raise LookupError(f"No recording at {path}; record it first with {PROVIDER_ENV}=record")
+        with path.open("rb") as fh:
+            return pickle.load(fh)
+
+    def _write(self, path, value):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with tmp_path.open("wb") as fh:
+            pickle.dump(value, fh)
+        os.replace(tmp_path, path)
+
+    def _call(self, kind, symbol, fetch):
+        path = self._path(kind, symbol)
+        if self.mode == "replay":
+            return self._read(path)
+        value = fetch()
+        with self._lock:
+            self._write(path, value)
+        return value
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        path = self._path("history", symbol, interval)
+
+        if self.mode == "record":
+            bars = self.upstream.history(symbol, period=period, start=start, interval=interval)
+            with self._lock:
+                # merge into what was recorded before so one file serves every request
+                if path.exists() and not bars.empty:
+                    recorded = self._read(path)
+                    merged = pd.concat([recorded, bars])
+                    merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+                    self._write(path, merged)
+                elif not bars.empty:
+                    self._write(path, bars)
+            return bars
+
+        bars = self._read(path)
+        if bars.empty:
+            return bars
+        if start is None:
+            # periods are measured back from the last recorded bar, not today
+            start = period_start(period, now=bars.index[-1].tz_localize(None))
+        if start is None:
+            return bars.copy()
+
+        start = pd.Timestamp(start)
+        if bars.index.tz is not None:
+            start = start.tz_localize(bars.index.tz) if start.tz is None else start.tz_convert(bars.index.tz)
+        return bars[bars.index >= start].copy()
+
+    def info(self, symbol):
+        return self._call("info", symbol, lambda: self.upstream.info(symbol))
+
+    def dividends(self, symbol):
+        return self._call("dividends", symbol, lambda: self.upstream.dividends(symbol))
+
+    def actions(self, symbol):
+        return self._call("actions", symbol, lambda: self.upstream.actions(symbol))
+
+    def recommendations(self, symbol):
+        return self._call("recommendations", symbol, lambda: self.upstream.recommendations(symbol))
+
+    def calendar(self, symbol):
+        return self._call("calendar", symbol, lambda: self.upstream.calendar(symbol))
+
+    def upgrades_downgrades(self, symbol):
+        return self._call("upgrades_downgrades", symbol, lambda: self.upstream.upgrades_downgrades(symbol))
+
+
+class ScheduledProvider(MarketDataProvider):
+    """
+    Sends every upstream call through the shared FetchScheduler so requests
+    are rate limited, retried with backoff and served by priority lane.
+    """
+
+    def __init__(self, upstream, scheduler=None):
+        self.upstream = upstream
+        self.scheduler = scheduler or get_scheduler()
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        return self.scheduler.run(lambda: self.upstream.history(symbol, period=period, start=start, interval=interval))
+
+    def info(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.info(symbol))
+
+    def dividends(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.dividends(symbol))
+
+    def actions(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.actions(symbol))
+
+    def recommendations(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.recommendations(symbol))
+
+    def calendar(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.calendar(symbol))
+
+    def upgrades_downgrades(self, symbol):
+        return self.scheduler.run(lambda: self.upstream.upgrades_downgrades(symbol))
+
+
+class CoalescingProvider(MarketDataProvider):
+    """
+    Single-flight wrapper: concurrent sessions asking for the same
+    (symbol, kind, period, interval) wait on one in-flight upstream call
+    and share its result instead of each hitting Yahoo.
+    """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.flights = SingleFlight()
+
+    def history(self, symbol, period=None, start=None, interval="1d"):
+        key = (symbol, "history", period, str(start), interval)
+        return self.flights.do(key, lambda: self.upstream.history(symbol, period=period, start=start, interval=interval))
+
+    def info(self, symbol):
+        return self.flights.do((symbol, "info"), lambda: self.upstream.info(symbol))
+
+    def dividends(self, symbol):
+        return self.flights.do((symbol, "dividends"), lambda: self.upstream.dividends(symbol))
+
+    def actions(self, symbol):
+        return self.flights.do((symbol, "actions"), lambda: self.upstream.actions(symbol))
+
+    def recommendations(self, symbol):
+        return self.flights.do((symbol, "recommendations"), lambda: self.upstream.recommendations(symbol))
+
+    def calendar(self, symbol):
+        return self.flights.do((symbol, "calendar"), lambda: self.upstream.calendar(symbol))
+
+    def upgrades_downgrades(self, symbol):
+        return self.flights.do((symbol, "upgrades_downgrades"), lambda: self.upstream.upgrades_downgrades(symbol))
+
+
+def _provider_from_env():
+    mode = os.environ.get(PROVIDER_ENV, "yfinance").lower()
+    # only calls that reach Yahoo go through the scheduler, replays run unthrottled
+    live = ScheduledProvider(YFinanceProvider())
+    if mode == "yfinance":
+        return live
+    root = Path(os.environ.get(RECORDINGS_ENV, DEFAULT_RECORDINGS))
+    return RecordReplayProvider(root=root, mode=mode, upstream=live)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """
+    The process-wide market data provider, created from the environment on first use.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = CoalescingProvider(_provider_from_env())
+        return _provider
+
+
+def set_provider(provider):
+    # Swap the backend, e.g. RecordReplayProvider for offline benchmarks
+    global _provider
+    if not isinstance(provider, CoalescingProvider):
+        provider = CoalescingProvider(provider)
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,127 @@
+import os
+import json
+import pickle
+import hashlib
+import threading
+from pathlib import Path
+from utils_cache import TTLCache
+
+
+# Content-addressed cache of backtest results. The key is built from cheap
+# identifiers only (symbol, period, interval, strategy, params, the bar
+# store's data version of the bars used and RESULT_VERSION of the code),
+# never from hashing the data, so a repeated backtest across reruns,
+# sessions and restarts is a lookup.
+RESULT_ROOT = Path("./cache/results")
+
+# Bump when the strategy, backtest or metrics logic changes so results
+# computed by the old code are not served again
+RESULT_VERSION = 1
+
+# Bytes kept on disk; the least recently used results are removed first
+MAX_BYTES = 256 * 1024 * 1024
+
+# Results also kept in memory for the current process
+MEMORY_TTL = 60 * 60
+MEMORY_MAXSIZE = 128
+
+
+def result_key(symbol, period, interval, strategy, params, bars):
+    """
+    Key of a backtest result, or None when the bars carry no data version
+    (e.g. served after a failed sync) and the result should not be cached.
+
+    Parameters:
+    - bars: The bars the backtest runs on, as returned by the bar store; their
+      first and last timestamp pin down the period slice.
+    """
+    version = bars.attrs.get("data_version")
+    if version is None or bars.empty:
+        return None
+    identity = [RESULT_VERSION, symbol, period, interval, strategy, sorted(params.items()), version,
+                str(bars.index[0]), str(bars.index[-1]), len(bars)]
+    return hashlib.sha1(json.dumps(identity, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Results stored as pickles named by their key, with an in-memory front.
+
+    Parameters:
+    - root: Folder of the pickles.
+    - max_bytes: Disk budget, least recently used files are evicted beyond it.
+    """
+
+    def __init__(self, root=RESULT_ROOT, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.memory = TTLCache(ttl=MEMORY_TTL, maxsize=MEMORY_MAXSIZE)
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.pkl"
+
+    def get(self, key):
+        if key is None:
+            return None
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            # the file time marks recent use for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Result cache: dropping unreadable {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        if key is None:
+            return
+        self.memory.set(key, value)
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Result cache: could not write {path}: {e}")
+            return
+        self.evict()
+
+    def evict(self):
+        # drop least recently used files until the folder fits the budget
+        with self._lock:
+            files = []
+            for path in self.root.glob("*/*.pkl"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def clear(self):
+        self.memory.clear()
+        for path in self.root.glob("*/*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+# one cache per process, shared by every session
+result_cache = ResultCache()
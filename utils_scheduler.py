@@ -0,0 +1,258 @@
+import time
+import heapq
+import random
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# Priority lanes, lower runs first
+PRIORITY_HIGH = 0    # content visible right now (price table, open tab)
+PRIORITY_NORMAL = 1  # rest of the page
+PRIORITY_LOW = 2     # background work (banner, warm-up)
+
+LANE_NAMES = {PRIORITY_HIGH: "high", PRIORITY_NORMAL: "normal", PRIORITY_LOW: "low"}
+
+# Default limits for Yahoo Finance
+REQUESTS_PER_SECOND = 4.0
+BURST = 8
+MAX_CONCURRENCY = 6
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 8.0
+
+# Errors that a retry cannot fix
+NON_RETRYABLE = (LookupError, ValueError, TypeError, NotImplementedError)
+
+_priority = contextvars.ContextVar("fetch_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def fetch_priority(priority):
+    """
+    Run the enclosed fetches in the given priority lane, e.g.
+
+        with fetch_priority(PRIORITY_HIGH):
+            fetch_stock_data(symbols)
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity` saved up.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # block until a token is available
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchScheduler:
+    """
+    Central queue for upstream requests: a token bucket caps the request
+    rate, a fixed set of worker threads caps concurrency, failed calls are
+    retried with exponential backoff and jitter, and jobs are served from
+    priority lanes so visible content loads first.
+
+    Parameters:
+    - rate: Requests per second allowed upstream.
+    - burst: Requests that may be sent back to back after an idle period.
+    - max_workers: Upstream requests in flight at once.
+    - max_retries: Retries after the first failed attempt.
+    - backoff: First retry delay in seconds, doubled on every retry.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST, max_workers=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, max_backoff=MAX_BACKOFF_SECONDS):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._retries = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _ensure_workers(self):
+        # called with self._cond held
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"fetch-worker-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def submit(self, fn, priority=None):
+        """
+        Queue fn() and return a Future with its result.
+        """
+        priority = current_priority() if priority is None else priority
+        future = Future()
+        with self._cond:
+            self._ensure_workers()
+            heapq.heappush(self._queue, (priority, next(self._seq), time.monotonic(), fn, future))
+            self._cond.notify()
+        return future
+
+    def run(self, fn, priority=None):
+        # submit and wait for the result
+        return self.submit(fn, priority).result()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _, _, queued_at, fn, future = heapq.heappop(self._queue)
+                waited = time.monotonic() - queued_at
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                self._in_flight += 1
+
+            if not future.set_running_or_notify_cancel():
+                with self._cond:
+                    self._in_flight -= 1
+                continue
+
+            try:
+                future.set_result(self._call_with_retry(fn))
+                failed = False
+            except BaseException as e:
+                future.set_exception(e)
+                failed = True
+
+            with self._cond:
+                self._in_flight -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def _call_with_retry(self, fn):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                return fn()
+            except NON_RETRYABLE:
+                raise
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                delay *= random.uniform(0.5, 1.5)
+                print(f"Fetch failed ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                with self._cond:
+                    self._retries += 1
+                time.sleep(delay)
+                attempt += 1
+
+    def stats(self):
+        """
+        Queue depth per lane, requests in flight and wait times (seconds).
+        """
+        with self._cond:
+            queued = {name: 0 for name in LANE_NAMES.values()}
+            for priority, *_ in self._queue:
+                lane = LANE_NAMES.get(priority, str(priority))
+                queued[lane] = queued.get(lane, 0) + 1
+            started = self._completed + self._failed + self._in_flight
+            return {
+                "queued": queued,
+                "in_flight": self._in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "retries": self._retries,
+                "avg_wait": self._wait_total / started if started else 0.0,
+                "max_wait": self._wait_max,
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """
+    The process-wide fetch scheduler shared by every session.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler()
+        return _scheduler
+
+
+def set_scheduler(scheduler):
+    # Replace the process-wide scheduler, e.g. a slower one per batch worker process
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+
+def map_in_context(fn, items, max_workers):
+    """
+    fn(item) for every item on a thread pool. Each call runs in a copy of the
+    caller's context, so the fetch priority lane carries into the workers.
+
+    Returns:
+    - List of results in the order of items.
+    """
+    items = list(items)
+    if not items:
+        return []
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(lambda item: context.copy().run(fn, item), items))
+
+
+class KeyedLocks:
+    """
+    One lock per key (symbol, file path, ...), created on first use, e.g.
+
+        _lock_for = KeyedLocks()
+        with _lock_for(symbol):
+            ...
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def __call__(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
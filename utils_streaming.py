@@ -0,0 +1,412 @@
+import json
+import math
+import hashlib
+from collections import deque
+from pathlib import Path
+import pandas as pd
+from utils_barstore import get_history
+from utils_scheduler import KeyedLocks, map_in_context
+from utils_panel import STRATEGIES, REQUIRED_PARAMS, RSI_OVERSOLD, RSI_OVERBOUGHT, check_params
+
+
+# Streaming indicators: each object keeps just enough state to update its
+# value from one new bar in O(1), and that state round-trips through plain
+# JSON. Values match the full-history computations in utils_panel bar for
+# bar (NaN until enough bars were seen).
+STATE_ROOT = Path("./cache/signals")
+
+MAX_WORKERS = 8
+
+NAN = float("nan")
+
+
+def _isnan(value):
+    return value is None or math.isnan(value)
+
+
+class StreamingSMA:
+    """
+    Simple moving average over the last `window` values.
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        self._values = deque()
+        self._sum = 0.0
+        self._updates = 0
+        self.value = NAN
+
+    def update(self, x):
+        self._values.append(x)
+        self._sum += x
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+        self._updates += 1
+        # re-add the window now and then so float error cannot build up
+        if self._updates % self.window == 0:
+            self._sum = math.fsum(self._values)
+        self.value = self._sum / self.window if len(self._values) == self.window else NAN
+        return self.value
+
+    def to_state(self):
+        return {"window": self.window, "values": list(self._values), "updates": self._updates}
+
+    @classmethod
+    def from_state(cls, state):
+        sma = cls(state["window"])
+        sma._values = deque(state["values"])
+        sma._sum = math.fsum(sma._values)
+        sma._updates = state["updates"]
+        sma.value = sma._sum / sma.window if len(sma._values) == sma.window else NAN
+        return sma
+
+
+class StreamingEMA:
+    """
+    Exponential moving average with adjust=False, like pandas ewm(span=...) or
+    ewm(alpha=...). The value is NaN until `min_periods` values were seen;
+    NaN inputs are skipped.
+    """
+
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        self.span = span
+        self.alpha = alpha if alpha is not None else 2 / (span + 1)
+        self.min_periods = int(min_periods)
+        self.count = 0
+        self._mean = NAN
+        self.value = NAN
+
+    def update(self, x):
+        if not _isnan(x):
+            self._mean = x if self.count == 0 else self._mean + self.alpha * (x - self._mean)
+            self.count += 1
+        self.value = self._mean if self.count >= max(self.min_periods, 1) else NAN
+        return self.value
+
+    def to_state(self):
+        return {"span": self.span, "alpha": self.alpha, "min_periods": self.min_periods,
+                "count": self.count, "mean": self._mean}
+
+    @classmethod
+    def from_state(cls, state):
+        ema = cls(alpha=state["alpha"], min_periods=state["min_periods"])
+        ema.span = state["span"]
+        ema.count = state["count"]
+        ema._mean = state["mean"]
+        ema.value = ema._mean if ema.count >= max(ema.min_periods, 1) else NAN
+        return ema
+
+
+class StreamingBollinger:
+    """
+    Bollinger bands: rolling mean +/- num_std sample standard deviations.
+    """
+
+    def __init__(self, window, num_std):
+        self.window = int(window)
+        self.num_std = float(num_std)
+        self._values = deque()
+        self._centre = None
+        self._sum = 0.0
+        self._squares = 0.0
+        self._updates = 0
+        self.middle = self.upper = self.lower = NAN
+
+    def _resum(self):
+        self._sum = math.fsum(x - self._centre for x in self._values)
+        self._squares = math.fsum((x - self._centre) ** 2 for x in self._values)
+
+    def update(self, x):
+        if self._centre is None:
+            # sums are kept around the first price to keep the squares precise
+            self._centre = x
+        self._values.append(x)
+        self._sum += x - self._centre
+        self._squares += (x - self._centre) ** 2
+        if len(self._values) > self.window:
+            old = self._values.popleft() - self._centre
+            self._sum -= old
+            self._squares -= old * old
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._resum()
+        return self._bands()
+
+    def _bands(self):
+        if len(self._values) < self.window:
+            self.middle = self.upper = self.lower = NAN
+        else:
+            n = self.window
+            self.middle = self._sum / n + self._centre
+            std = math.sqrt(max(self._squares - self._sum * self._sum / n, 0.0) / (n - 1)) if n > 1 else NAN
+            self.upper = self.middle + self.num_std * std
+            self.lower = self.middle - self.num_std * std
+        return self.middle, self.upper, self.lower
+
+    def to_state(self):
+        return {"window": self.window, "num_std": self.num_std, "values": list(self._values),
+                "centre": self._centre, "updates": self._updates}
+
+    @classmethod
+    def from_state(cls, state):
+        bands = cls(state["window"], state["num_std"])
+        bands._values = deque(state["values"])
+        bands._centre = state["centre"]
+        bands._updates = state["updates"]
+        if bands._values:
+            bands._resum()
+            bands._bands()
+        return bands
+
+
+class StreamingMACD:
+    """
+    MACD line, signal line and histogram as in ta.trend.MACD.
+    """
+
+    def __init__(self, fast, slow, signal):
+        self.fast = StreamingEMA(span=fast, min_periods=fast)
+        self.slow = StreamingEMA(span=slow, min_periods=slow)
+        self.signal = StreamingEMA(span=signal, min_periods=signal)
+        self.macd = self.signal_line = self.histogram = NAN
+
+    def update(self, x):
+        self.macd = self.fast.update(x) - self.slow.update(x)
+        self.signal_line = self.signal.update(self.macd)
+        self.histogram = self.macd - self.signal_line
+        return self.macd, self.signal_line, self.histogram
+
+    def to_state(self):
+        return {"fast": self.fast.to_state(), "slow": self.slow.to_state(), "signal": self.signal.to_state(),
+                "macd": self.macd, "signal_line": self.signal_line}
+
+    @classmethod
+    def from_state(cls, state):
+        macd = cls.__new__(cls)
+        macd.fast = StreamingEMA.from_state(state["fast"])
+        macd.slow = StreamingEMA.from_state(state["slow"])
+        macd.signal = StreamingEMA.from_state(state["signal"])
+        macd.macd, macd.signal_line = state["macd"], state["signal_line"]
+        macd.histogram = macd.macd - macd.signal_line
+        return macd
+
+
+class StreamingRSI:
+    """
+    Wilder RSI as in ta.momentum.RSIIndicator; the first bar counts as no move.
+    """
+
+    def __init__(self, window):
+        self.window = int(window)
+        self.up = StreamingEMA(alpha=1 / self.window, min_periods=self.window)
+        self.down = StreamingEMA(alpha=1 / self.window, min_periods=self.window)
+        self.previous = None
+        self.value = NAN
+
+    def update(self, x):
+        diff = 0.0 if self.previous is None else x - self.previous
+        self.previous = x
+        up, down = self.up.update(max(diff, 0.0)), self.down.update(max(-diff, 0.0))
+        if _isnan(up) or _isnan(down):
+            self.value = NAN
+        elif down == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + up / down)
+        return self.value
+
+    def to_state(self):
+        return {"window": self.window, "up": self.up.to_state(), "down": self.down.to_state(),
+                "previous": self.previous, "value": self.value}
+
+    @classmethod
+    def from_state(cls, state):
+        rsi = cls(state["window"])
+        rsi.up = StreamingEMA.from_state(state["up"])
+        rsi.down = StreamingEMA.from_state(state["down"])
+        rsi.previous, rsi.value = state["previous"], state["value"]
+        return rsi
+
+
+class StreamingStrategy:
+    """
+    Signal of one strategy updated bar by bar, with the same rules as
+    utils_panel.compute_signals: 1.0 buy/hold, -1.0 sell, 0.0 flat.
+
+    Parameters:
+    - strategy: One of STRATEGIES.
+    - params: Dict with the strategy parameters (see utils_panel.REQUIRED_PARAMS).
+    """
+
+    def __init__(self, strategy, params):
+        check_params(strategy, params)
+        self.strategy = strategy
+        self.params = dict(params)
+        self.bars = 0
+        self.last_date = None
+        self.last_close = None
+        self.signal = NAN
+        self.indicators = {}
+
+        if strategy == STRATEGIES[0]:
+            self._parts = {"SMA": StreamingSMA(params["sma_period"]), "EMA": StreamingEMA(span=params["ema_period"])}
+        elif strategy == STRATEGIES[1]:
+            self._parts = {"Bands": StreamingBollinger(params["bb_period"], params["bb_std"])}
+        elif strategy == STRATEGIES[2]:
+            self._parts = {"MACD": StreamingMACD(params["macd_fast"], params["macd_slow"], params["macd_signal"])}
+        else:
+            self._parts = {"RSI": StreamingRSI(params["rsi_period"])}
+
+    def update(self, close, date=None):
+        """
+        Feed one closing price, returns the signal after it.
+        """
+        parts = self._parts
+
+        if self.strategy == STRATEGIES[0]:
+            sma, ema = parts["SMA"].update(close), parts["EMA"].update(close)
+            self.indicators = {"SMA": sma, "EMA": ema}
+            # no signal before bar number sma_period, as in the full-history path
+            self.signal = 1.0 if ema > sma and self.bars >= self.params["sma_period"] else 0.0
+        elif self.strategy == STRATEGIES[1]:
+            middle, upper, lower = parts["Bands"].update(close)
+            self.indicators = {"Middle_Band": middle, "Upper_Band": upper, "Lower_Band": lower}
+            self.signal = -1.0 if close > upper else 1.0 if close < lower else 0.0
+        elif self.strategy == STRATEGIES[2]:
+            macd, line, histogram = parts["MACD"].update(close)
+            self.indicators = {"MACD": macd, "Signal_Line": line, "MACD_Histogram": histogram}
+            self.signal = 1.0 if macd > line else -1.0 if macd < line else 0.0
+        else:
+            rsi = parts["RSI"].update(close)
+            self.indicators = {"RSI": rsi}
+            self.signal = 1.0 if rsi < RSI_OVERSOLD else -1.0 if rsi > RSI_OVERBOUGHT else 0.0
+
+        self.bars += 1
+        self.last_close = float(close)
+        self.last_date = None if date is None else str(date)
+        return self.signal
+
+    def to_state(self):
+        return {
+            "strategy": self.strategy,
+            "params": self.params,
+            "bars": self.bars,
+            "last_date": self.last_date,
+            "last_close": self.last_close,
+            "signal": self.signal,
+            "indicators": self.indicators,
+            "parts": {name: part.to_state() for name, part in self._parts.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        monitor = cls(state["strategy"], state["params"])
+        for name, part in monitor._parts.items():
+            monitor._parts[name] = type(part).from_state(state["parts"][name])
+        monitor.bars = state["bars"]
+        monitor.last_date = state["last_date"]
+        monitor.last_close = state["last_close"]
+        monitor.signal = state["signal"]
+        monitor.indicators = state["indicators"]
+        return monitor
+
+
+_lock_for = KeyedLocks()
+
+
+def _state_path(symbol, strategy, params, interval):
+    key = json.dumps([strategy, sorted(params.items()), interval], default=str)
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return STATE_ROOT / interval / f"{symbol}-{digest}.json"
+
+
+def _bar_position(index, date):
+    # position of the bar stamped `date` (a saved last_date), -1 when not found
+    if date is None:
+        return -1
+    try:
+        date = pd.Timestamp(date)
+        if index.tz is not None:
+            date = date.tz_convert(index.tz)
+        i = index.searchsorted(date)
+    except (TypeError, ValueError):
+        return -1
+    return i if i < len(index) and index[i] == date else -1
+
+
+def update_signal(symbol, strategy, params, period="1y", interval="1d"):
+    """
+    Latest signal of a symbol, updated from the bar store by feeding only the
+    bars that arrived since the saved state.
+
+    The saved state covers closed bars only: the last bar (which may still be
+    forming) is fed to a copy, so the next call can replace it. When the
+    stored prices were re-adjusted (new dividend or split) the state is
+    rebuilt from the bars of `period`.
+
+    Returns:
+    - Dict with 'Symbol', 'Date', 'Close', 'Signal' and the indicator values,
+      or None when there are no bars.
+    """
+    check_params(strategy, params)
+    params = {name: params[name] for name in REQUIRED_PARAMS[strategy]}
+    path = _state_path(symbol, strategy, params, interval)
+
+    with _lock_for(path):
+        bars = get_history(symbol, period, interval)
+        if bars.empty:
+            return None
+        closes = bars["Close"]
+
+        monitor = None
+        if path.exists():
+            try:
+                monitor = StreamingStrategy.from_state(json.loads(path.read_text()))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Signals: could not read {path}: {e}")
+
+        start = 0
+        i = _bar_position(bars.index, monitor.last_date) if monitor is not None else -1
+        if i >= 0 and math.isclose(closes.iloc[i], monitor.last_close, rel_tol=1e-9):
+            start = i + 1
+        else:
+            monitor = None
+
+        if monitor is None:
+            monitor = StreamingStrategy(strategy, params)
+            start = 0
+
+        # commit every closed bar, then feed the latest one to a copy
+        for date, close in closes.iloc[start:-1].items():
+            monitor.update(float(close), date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(monitor.to_state()))
+
+        live = StreamingStrategy.from_state(monitor.to_state())
+        if start <= len(closes) - 1:
+            live.update(float(closes.iloc[-1]), closes.index[-1])
+
+    return {"Symbol": symbol, "Date": bars.index[-1], "Close": float(closes.iloc[-1]),
+            "Signal": live.signal, **live.indicators}
+
+
+def update_signals(symbols, strategy, params, period="1y", interval="1d"):
+    """
+    update_signal for several symbols concurrently, e.g. a whole watchlist.
+
+    Returns:
+    - DataFrame with one row per symbol that has bars.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return pd.DataFrame()
+
+    def update(symbol):
+        try:
+            return update_signal(symbol, strategy, params, period, interval)
+        except Exception as e:
+            print(f"Signals: update failed for {symbol}: {e}")
+            return None
+
+    rows = map_in_context(update, symbols, MAX_WORKERS)
+    return pd.DataFrame([row for row in rows if row is not None])
@@ -0,0 +1,230 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from utils_barstore import get_histories
+from utils_panel import STRATEGIES, compute_signals, backtest_arrays, PanelBacktest
+
+
+# Parameter sweep: every combination of a grid of strategy parameters is
+# backtested per ticker. Intermediates are shared across the grid (prefix
+# sums give every SMA window and rolling std, each EMA span is computed once)
+# and each candidate column only costs the signal and return arithmetic.
+# Tickers are spread over a process pool.
+
+# The two parameters swept per strategy (heatmap rows, columns); the other
+# parameters are held at the values picked in the sidebar
+SWEEP_AXES = {
+    "Moving Average Crossover": ("sma_period", "ema_period"),
+    "Bollinger Bands": ("bb_period", "bb_std"),
+    "MACD": ("macd_fast", "macd_slow"),
+    "RSI": ("rsi_period", None),
+}
+
+# Default (start, stop, step) of every swept parameter, stop included
+SWEEP_DEFAULTS = {
+    "sma_period": (5, 250, 5),
+    "ema_period": (5, 250, 5),
+    "bb_period": (10, 60, 5),
+    "bb_std": (1.0, 3.0, 0.25),
+    "macd_fast": (4, 20, 2),
+    "macd_slow": (20, 50, 2),
+    "rsi_period": (5, 30, 1),
+}
+
+MAX_WORKERS = os.cpu_count() or 1
+
+
+def parameter_values(start, stop, step):
+    """
+    Values from start to stop (included) in steps of step; integers unless
+    any bound is a float.
+    """
+    if step <= 0 or stop < start:
+        raise ValueError(f"Invalid sweep range {start} to {stop} step {step}.")
+    values = np.arange(start, stop + step / 2, step)
+    if all(isinstance(v, (int, np.integer)) for v in (start, stop, step)):
+        return [int(v) for v in values]
+    return [round(float(v), 6) for v in values]
+
+
+def _rolling_sums(close, windows):
+    # rolling mean and sample std for every window from one pair of prefix sums;
+    # prices are centred first so the sums of squares keep their precision
+    centre = close[0]
+    x = close - centre
+    s1 = np.concatenate([[0.0], np.cumsum(x)])
+    s2 = np.concatenate([[0.0], np.cumsum(x * x)])
+    means, stds = {}, {}
+    for w in windows:
+        mean = np.full(len(close), np.nan)
+        std = np.full(len(close), np.nan)
+        total = s1[w:] - s1[:-w]
+        squares = s2[w:] - s2[:-w]
+        mean[w - 1:] = total / w + centre
+        if w > 1:
+            std[w - 1:] = np.sqrt(np.maximum(squares - total * total / w, 0.0) / (w - 1))
+        means[w], stds[w] = mean, std
+    return means, stds
+
+
+def _ema_table(close, spans, min_periods=True):
+    # one ewm pass per span (adjust=False like the indicator graph's 'ema' node)
+    series = pd.Series(close)
+    return {span: series.ewm(span=span, min_periods=span if min_periods else 0, adjust=False).mean().to_numpy()
+            for span in spans}
+
+
+def _evaluate(close, signal):
+    # backtest many candidate signal columns against one close series
+    prices = np.repeat(close[:, None], signal.shape[1], axis=1)
+    results = backtest_arrays(prices, signal)
+    return {key: results[key] for key in PanelBacktest.METRIC_COLUMNS}
+
+
+def _signals(close, indicators, strategy, params):
+    width = next(iter(indicators.values())).shape[1]
+    prices = pd.DataFrame(np.repeat(close[:, None], width, axis=1))
+    return compute_signals(prices, {name: pd.DataFrame(value) for name, value in indicators.items()},
+                           strategy, params)
+
+
+def sweep_close(close, strategy, grid, params):
+    """
+    Backtest every parameter combination of a grid on one close series.
+
+    Parameters:
+    - close: 1-D array of closing prices.
+    - strategy: One of STRATEGIES.
+    - grid: Dict of swept parameter name -> list of values (see SWEEP_AXES).
+    - params: Values of the parameters that are not swept.
+
+    Returns:
+    - DataFrame with one row per combination: the swept parameters followed by
+      the metric columns of PanelBacktest.
+    """
+    close = np.asarray(close, dtype=float)
+    x_name, y_name = SWEEP_AXES[strategy]
+    # windows longer than the history cannot produce a signal
+    xs = [x for x in grid[x_name] if x <= len(close)]
+    ys = grid[y_name] if y_name else [None]
+    if y_name and y_name != "bb_std":
+        ys = [y for y in ys if y <= len(close)]
+
+    columns = [name for name in (x_name, y_name) if name] + list(PanelBacktest.METRIC_COLUMNS)
+    if not xs or not ys:
+        return pd.DataFrame(columns=columns)
+
+    blocks = []
+
+    def add(x, ys_block, metrics):
+        block = {x_name: [x] * len(ys_block)}
+        if y_name:
+            block[y_name] = ys_block
+        block.update(metrics)
+        blocks.append(pd.DataFrame(block))
+
+    if strategy == STRATEGIES[0]:
+        means, _ = _rolling_sums(close, xs)
+        # EMA here has no min_periods, as in compute_indicators
+        emas = np.column_stack(list(_ema_table(close, ys, min_periods=False).values()))
+        for sma_period in xs:
+            sma = np.repeat(means[sma_period][:, None], len(ys), axis=1)
+            signal = _signals(close, {"EMA": emas, "SMA": sma}, strategy, {"sma_period": sma_period})
+            add(sma_period, ys, _evaluate(close, signal))
+
+    elif strategy == STRATEGIES[1]:
+        means, stds = _rolling_sums(close, xs)
+        k = np.asarray(ys, dtype=float)[None, :]
+        for bb_period in xs:
+            middle, width = means[bb_period][:, None], stds[bb_period][:, None] * k
+            signal = _signals(close, {"Lower_Band": middle - width, "Upper_Band": middle + width},
+                              strategy, params)
+            add(bb_period, ys, _evaluate(close, signal))
+
+    elif strategy == STRATEGIES[2]:
+        emas = _ema_table(close, sorted(set(xs) | set(ys)))
+        slow = np.column_stack([emas[span] for span in ys])
+        for macd_fast in xs:
+            macd = pd.DataFrame(emas[macd_fast][:, None] - slow)
+            # one 2-D ewm pass gives the signal line of every slow period
+            line = macd.ewm(span=params["macd_signal"], min_periods=params["macd_signal"], adjust=False).mean()
+            signal = _signals(close, {"MACD": macd.to_numpy(), "Signal_Line": line.to_numpy()}, strategy, params)
+            add(macd_fast, ys, _evaluate(close, signal))
+
+    elif strategy == STRATEGIES[3]:
+        diff = np.diff(close, prepend=close[0])
+        up = pd.Series(np.where(diff > 0, diff, 0.0))
+        down = pd.Series(np.where(diff < 0, -diff, 0.0))
+        rsi_columns = []
+        for window in xs:
+            ema_up = up.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+            ema_down = down.ewm(alpha=1 / window, min_periods=window, adjust=False).mean().to_numpy()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = 100 - 100 / (1 + ema_up / ema_down)
+            rsi_columns.append(np.where(ema_down == 0, 100.0, rsi))
+        signal = _signals(close, {"RSI": np.column_stack(rsi_columns)}, strategy, params)
+        blocks.append(pd.DataFrame({x_name: xs, **_evaluate(close, signal)}))
+
+    else:
+        raise ValueError(f"Invalid strategy selected: {strategy}")
+
+    return pd.concat(blocks, ignore_index=True)[columns]
+
+
+def _sweep_task(args):
+    # process pool entry point, one ticker per task
+    ticker, close, strategy, grid, params = args
+    return ticker, sweep_close(close, strategy, grid, params)
+
+
+def process_pool(max_workers):
+    """
+    Process pool for CPU-bound backtests. Workers are spawned rather than
+    forked: the Streamlit server process runs scheduler, banner and poller
+    threads, and a forked child could inherit one of their locks held.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_sweep(tickers, period, strategy, grid, params, max_workers=MAX_WORKERS):
+    """
+    Parameter sweep over several tickers, one process per ticker.
+
+    Parameters:
+    - tickers: List of ticker symbols.
+    - period: yfinance style period ('1y', '10y', ...).
+    - strategy: One of STRATEGIES.
+    - grid: Dict of swept parameter name -> list of values.
+    - params: Values of the parameters that are not swept.
+
+    Returns:
+    - results: DataFrame of every ticker and combination ranked by total return
+      within each ticker ('Rank' 1 is best), metrics labelled like PanelBacktest.
+    - errors: Dict of ticker -> reason it was skipped.
+    """
+    histories = get_histories(tickers, period)
+    tasks, errors = [], {}
+    for ticker in tickers:
+        hist = histories.get(ticker)
+        if hist is None or hist.empty:
+            errors[ticker] = f"No data found for {ticker} over the specified period."
+        else:
+            tasks.append((ticker, hist["Close"].to_numpy(dtype=float), strategy, grid, params))
+
+    if len(tasks) > 1 and max_workers > 1:
+        with process_pool(min(max_workers, len(tasks))) as pool:
+            swept = list(pool.map(_sweep_task, tasks))
+    else:
+        swept = [_sweep_task(task) for task in tasks]
+
+    frames = []
+    for ticker, frame in swept:
+        frame = frame.sort_values("total_return", ascending=False, na_position="last", kind="stable")
+        frame.insert(0, "Rank", np.arange(1, len(frame) + 1))
+        frame.insert(0, "Ticker", ticker)
+        frames.append(frame)
+
+    results = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return results.rename(columns=PanelBacktest.METRIC_COLUMNS), errors
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+from utils_barstore import get_histories
+from utils_panel import PanelBacktest, compute_indicators, compute_signals, backtest_arrays
+from utils_sweep import SWEEP_AXES, MAX_WORKERS, sweep_close, process_pool
+
+
+# Walk-forward evaluation: the history is cut into consecutive train/test
+# folds. Parameters are optimized on each train window with the parameter
+# sweep and scored on the test window that follows, so every reported
+# return is out of sample. Folds of every ticker run in a process pool.
+
+# Default fold sizes in bars (about one year of training, one quarter of testing)
+TRAIN_BARS = 252
+TEST_BARS = 63
+
+
+def make_folds(n_bars, train_bars=TRAIN_BARS, test_bars=TEST_BARS, anchored=False):
+    """
+    Train/test bar ranges; test windows follow each other without overlap.
+
+    Parameters:
+    - n_bars: Length of the history.
+    - train_bars: Bars in each train window.
+    - test_bars: Bars in each test window.
+    - anchored: Train windows all start at the first bar and grow (expanding
+      window) instead of rolling forward.
+
+    Returns:
+    - List of (train_start, train_end, test_end); the test window is
+      train_end to test_end, ends excluded.
+    """
+    folds = []
+    train_end = train_bars
+    while train_end + test_bars <= n_bars:
+        train_start = 0 if anchored else train_end - train_bars
+        folds.append((train_start, train_end, train_end + test_bars))
+        train_end += test_bars
+    return folds
+
+
+def score_window(close, strategy, params, start, end, warmup_start=0):
+    """
+    Backtest one parameter set on close[start:end]. Indicators are computed
+    from warmup_start so the window starts with warmed-up indicators, and the
+    first bar is traded on the signal of the bar before it.
+
+    Returns:
+    - Dict of the metrics of PanelBacktest.METRIC_COLUMNS.
+    """
+    frame = pd.DataFrame({"close": np.asarray(close[warmup_start:end], dtype=float)})
+    signal = compute_signals(frame, compute_indicators(frame, strategy, params), strategy, params)
+    # keep the bar before the window: its close and signal price the first return
+    first = max(start - warmup_start - 1, 0)
+    results = backtest_arrays(frame.to_numpy()[first:], signal[first:])
+    return {key: float(results[key][0]) for key in PanelBacktest.METRIC_COLUMNS}
+
+
+def _fold_task(args):
+    # process pool entry point, one (ticker, fold) per task
+    ticker, fold, close, strategy, grid, params, (train_start, train_end, test_end) = args
+    ranked = sweep_close(close[train_start:train_end], strategy, grid, params)
+    ranked = ranked.dropna(subset=["total_return"])
+    if ranked.empty:
+        return None
+
+    best = ranked.loc[ranked["total_return"].idxmax()]
+    chosen = dict(params)
+    for name in filter(None, SWEEP_AXES[strategy]):
+        # the row is all floats, windows go back to int like the grid
+        chosen[name] = int(best[name]) if isinstance(grid[name][0], int) else float(best[name])
+
+    test = score_window(close, strategy, chosen, train_end, test_end, warmup_start=train_start)
+    row = {"Ticker": ticker, "Fold": fold}
+    row.update({name: chosen[name] for name in filter(None, SWEEP_AXES[strategy])})
+    row.update({
+        "train_start": train_start,
+        "test_start": train_end,
+        "test_end": test_end,
+        "In-Sample Return": best["total_return"],
+        "Test Return": test["total_return"],
+        "Test Benchmark Return": test["benchmark_return"],
+        "Test Trades": test["num_trades"],
+        "Test Win Rate": test["win_rate"],
+    })
+    return row
+
+
+def summarize_folds(folds):
+    """
+    Aggregate fold rows of one or more tickers.
+
+    Returns:
+    - DataFrame per ticker: folds, compounded test return and benchmark,
+      mean test return and the share of folds that made money.
+    """
+    if folds.empty:
+        return pd.DataFrame()
+    grouped = folds.groupby("Ticker", sort=False)
+    return pd.DataFrame({
+        "Folds": grouped["Fold"].count(),
+        "Compounded Test Return": grouped["Test Return"].apply(lambda r: (1 + r).prod() - 1),
+        "Compounded Benchmark Return": grouped["Test Benchmark Return"].apply(lambda r: (1 + r).prod() - 1),
+        "Mean Test Return": grouped["Test Return"].mean(),
+        "Profitable Folds": grouped["Test Return"].apply(lambda r: (r > 0).mean()),
+    })
+
+
+def run_walk_forward(tickers, period, strategy, grid, params, train_bars=TRAIN_BARS, test_bars=TEST_BARS,
+                     anchored=False, max_workers=MAX_WORKERS):
+    """
+    Walk-forward evaluation of a strategy over several tickers.
+
+    Parameters:
+    - tickers: List of ticker symbols.
+    - period: yfinance style period of the whole history ('5y', '10y', ...).
+    - strategy: One of STRATEGIES.
+    - grid: Dict of swept parameter name -> list of values (see utils_sweep).
+    - params: Values of the parameters that are not swept.
+    - train_bars, test_bars, anchored: Fold layout, see make_folds.
+
+    Returns:
+    - folds: DataFrame with one row per ticker and fold (chosen parameters,
+      in-sample return, test metrics, fold dates).
+    - errors: Dict of ticker -> reason it was skipped.
+    """
+    histories = get_histories(tickers, period)
+    tasks, dates, errors = [], {}, {}
+    for ticker in tickers:
+        hist = histories.get(ticker)
+        if hist is None or hist.empty:
+            errors[ticker] = f"No data found for {ticker} over the specified period."
+            continue
+        folds = make_folds(len(hist), train_bars, test_bars, anchored)
+        if not folds:
+            errors[ticker] = (f"Not enough data for a {train_bars}-bar train and {test_bars}-bar test "
+                              f"window for {ticker}, try a longer period.")
+            continue
+        close = hist["Close"].to_numpy(dtype=float)
+        dates[ticker] = hist.index
+        tasks.extend((ticker, i + 1, close, strategy, grid, params, fold) for i, fold in enumerate(folds))
+
+    if len(tasks) > 1 and max_workers > 1:
+        with process_pool(min(max_workers, len(tasks))) as pool:
+            rows = list(pool.map(_fold_task, tasks))
+    else:
+        rows = [_fold_task(task) for task in tasks]
+
+    folds = pd.DataFrame([row for row in rows if row is not None])
+    if folds.empty:
+        return folds, errors
+
+    def to_dates(column, offset=0):
+        # bar numbers -> dates of each ticker
+        return [dates[ticker][i + offset] for ticker, i in zip(folds["Ticker"], folds[column])]
+
+    folds.insert(2, "Train Start", to_dates("train_start"))
+    folds.insert(3, "Test Start", to_dates("test_start"))
+    folds.insert(4, "Test End", to_dates("test_end", -1))
+    return folds.drop(columns=["train_start", "test_start", "test_end"]), errors
@@ -0,0 +1,81 @@
+import json
+import threading
+from pathlib import Path
+from utils_journal import TransactionJournal
+from utils_barstore import get_history
+from utils_fundamentals import get_info
+from utils_actions import get_dividends
+from utils_scheduler import fetch_priority, map_in_context, PRIORITY_LOW
+
+
+# Longest default period the pages ask for (watchlist chart and correlation tab),
+# shorter periods are served from the same stored bars
+WARMUP_PERIOD = "1y"
+
+MAX_WORKERS = 4
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def collect_user_symbols(user_path):
+    """
+    Symbols found in a user's watchlist JSON files and buy transactions.
+
+    Parameters:
+    - user_path: Local folder of the user, e.g. Path('./user_data/andy').
+    """
+    user_path = Path(user_path)
+    symbols = []
+
+    for watchlist_file in sorted((user_path / "watchlist").glob("*.json")):
+        try:
+            watchlists = json.loads(watchlist_file.read_text())
+        except (OSError, ValueError) as e:
+            print(f"Warm-up: skipping {watchlist_file}: {e}")
+            continue
+        if isinstance(watchlists, dict):
+            for watchlist in watchlists.values():
+                symbols.extend(watchlist)
+
+    try:
+        symbols.extend(TransactionJournal(user_path / "portfolio").load("buy")["Ticker"].dropna())
+    except (OSError, ValueError) as e:
+        print(f"Warm-up: skipping buy transactions of {user_path}: {e}")
+
+    return list(dict.fromkeys(symbols))
+
+
+def _warm_symbol(symbol):
+    # each fetch is independent, one failure should not stop the others
+    for warm in (lambda: get_history(symbol, WARMUP_PERIOD),
+                 lambda: get_info(symbol),
+                 lambda: get_dividends(symbol)):
+        try:
+            warm()
+        except Exception as e:
+            print(f"Warm-up failed for {symbol}: {e}")
+
+
+def _warm_up(symbols):
+    with fetch_priority(PRIORITY_LOW):
+        map_in_context(_warm_symbol, symbols, MAX_WORKERS)
+    print(f"Warm-up finished for {len(symbols)} symbols")
+
+
+def start_warmup(user_id, user_path):
+    """
+    Prefetch history, info and dividends for every symbol of the user on a
+    background thread, in the low priority lane so pages are never delayed.
+    A warm-up already running for the user is not started twice.
+    """
+    with _jobs_lock:
+        job = _jobs.get(user_id)
+        if job is not None and job.is_alive():
+            return job
+
+        symbols = collect_user_symbols(user_path)
+        job = threading.Thread(target=_warm_up, args=(symbols,), name=f"warmup-{user_id}", daemon=True)
+        _jobs[user_id] = job
+        job.start()
+        return job
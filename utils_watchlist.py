@@ -1,7 +1,6 @@
 import pathlib
 import json
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
@@ -9,6 +8,24 @@ from googleapiclient.http import MediaFileUpload
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 from utils_markdown import display_md
+from utils_barstore import get_history
+from utils_fundamentals import get_info
+from utils_provider import get_provider
+from utils_actions import get_dividends
+from utils_intraday import intraday_poller
+from utils_streaming import update_signals
+from utils_backtest import strategy_params
+from utils_scheduler import fetch_priority, get_scheduler, map_in_context, PRIORITY_HIGH
+
+# Worker threads for fetching watchlist name metadata
+QUOTE_WORKERS = 8
+
+# Seconds between price table updates when auto-refresh is on
+AUTO_REFRESH_SECONDS = 60
+
+# Labels of the strategy signal column
+SIGNAL_LABELS = {1.0: 'Buy', -1.0: 'Sell', 0.0: 'Neutral'}
+
 
 def load_watchlists(file_path):
 # Function to load watchlists from a JSON file
@@ -42,17 +59,42 @@ def save_watchlists(file_path, watchlists):
 
 
 
-def fetch_stock_data(symbols):
-# Function to fetch stock prices and additional data using.history with 1-minute interval
+def fetch_short_name(symbol):
+    try:
+        return get_info(symbol).get('shortName', 'N/A')
+    except Exception:
+        return 'N/A'
+
+
+def fetch_signals(symbols, strategy):
+    # latest daily signal of each symbol with the strategy's default parameters,
+    # the indicators are kept on disk and only stepped over the new bars
+    params = {name: spec["value"] for name, spec in strategy_params[strategy].items() if name != "period_select"}
+    signals = update_signals(symbols, strategy, params)
+    if signals.empty:
+        return {}
+    return {symbol: SIGNAL_LABELS.get(signal, 'N/A') for symbol, signal in zip(signals['Symbol'], signals['Signal'])}
+
+
+def fetch_stock_data(symbols, signals=None):
+# Function to fetch stock prices and additional data for the whole watchlist in one batch
+# signals: optional dict of symbol -> signal label (see fetch_signals), shown as a 'Signal' column
+    symbols = list(symbols)
+    if not symbols:
+        return pd.DataFrame()
+
+    # name metadata fetched concurrently in the caller's priority lane, then
+    # 1-minute bars of the last session for every symbol, only new bars are polled
+    names = dict(zip(symbols, map_in_context(fetch_short_name, symbols, QUOTE_WORKERS)))
+    histories = intraday_poller.poll(symbols)
+
     stock_data = []
     for symbol in symbols:
-        stock = yf.Ticker(symbol)
-        # Fetch historical data for the last 1 day with 1-minute interval
-        hist = stock.history(period="1d", interval="1m")
+        hist = histories.get(symbol, pd.DataFrame())
         if not hist.empty:
             latest = hist.iloc[-1]
             stock_data.append({
-                'Name': stock.info.get('shortName', 'N/A'),
+                'Name': names[symbol],
                 'Current Price': latest['Close'],
                 'Volume': latest['Volume'],
                 'Open': latest['Open'],
@@ -62,6 +104,8 @@ def fetch_stock_data(symbols):
                 'Last Trade Time': latest.name.time(),
                 'Last Trade Date': latest.name.date(),
             })
+            if signals is not None:
+                stock_data[-1]['Signal'] = signals.get(symbol, 'N/A')
         
         else:
             st.warning("No stock data appended")
@@ -94,6 +138,12 @@ def create_styled_df(df):
                 styles[current_price_idx] = 'color: #f5651d; font-weight: bold'
             elif row['Current Price'] > row['Open']:
                 styles[current_price_idx] = 'color:#04b568; font-weight: bold'
+            if 'Signal' in row.index:
+                signal_idx = df.columns.get_loc('Signal')
+                if row['Signal'] == 'Buy':
+                    styles[signal_idx] = 'color:#04b568; font-weight: bold'
+                elif row['Signal'] == 'Sell':
+                    styles[signal_idx] = 'color: #f5651d; font-weight: bold'
             return styles
 
         styled_df = (
@@ -106,35 +156,46 @@ def create_styled_df(df):
 
 
 
-@st.fragment
-def fetch_and_display_price(selected_symbols):
-    #display stock data in data frame
-    stock_data = fetch_stock_data(selected_symbols)
+def format_fetch_stats(stats):
+    # one line summary of the fetch scheduler for the price table footer
+    queued = sum(stats['queued'].values())
+    return (f":grey[Data queue: {queued} waiting, {stats['in_flight']} in flight · "
+            f"avg wait {stats['avg_wait']:.1f}s, max {stats['max_wait']:.1f}s · "
+            f"{stats['retries']} retries, {stats['failed']} failed]")
+
+
+def display_price(selected_symbols, auto_refresh, strategy=None):
+    #display stock data in data frame, the price table is fetched ahead of the tabs below
+    with fetch_priority(PRIORITY_HIGH):
+        signals = fetch_signals(selected_symbols, strategy) if strategy else None
+        stock_data = fetch_stock_data(selected_symbols, signals)
     styled_df = create_styled_df(stock_data)
 
     if styled_df is not None:
         with st.container():
             st.dataframe(styled_df, hide_index=True, use_container_width=True)
+        st.caption(format_fetch_stats(get_scheduler().stats()))
         # button("Save Watchlist", type='primary', icon=":material/bookmark_add:"):
-        if st.button("Refresh Price",  type='primary',):
-            st.rerun()
+        if not auto_refresh and st.button("Refresh Price",  type='primary',):
+            st.rerun(scope="fragment")
 
 
-# @st.cache_data
-def fetch_info(symbol):
-    stock = yf.Ticker(symbol)
-    stock.get_analyst_price_target
+def fetch_and_display_price(selected_symbols, auto_refresh=False, strategy=None):
+    # the price table is a fragment, with auto-refresh it reruns on its own every AUTO_REFRESH_SECONDS
+    # strategy: adds the live signal of this strategy (one of utils_panel.STRATEGIES) as a column
+    run_every = AUTO_REFRESH_SECONDS if auto_refresh else None
+    st.fragment(display_price, run_every=run_every)(selected_symbols, auto_refresh, strategy)
 
 
 # @st.cache_data
-def fetch_earnings_calendar(_stock):
-    data = _stock.get_calendar()
+def fetch_earnings_calendar(symbol):
+    data = get_provider().calendar(symbol)
     return data
 
 
 # @st.cache_data
-def fetch_recommendations(_stock):
-    data = _stock.get_recommendations_summary()
+def fetch_recommendations(symbol):
+    data = get_provider().recommendations(symbol)
     if data.empty:
         #st.warning("No Recommendations found")
         return None, None, None 
@@ -143,14 +204,14 @@ def fetch_recommendations(_stock):
     return data, numeric_df, max_value
 
 @st.cache_data
-def fetch_upgrades_downgrades(_stock):
-    data = _stock.get_upgrades_downgrades()
+def fetch_upgrades_downgrades(symbol):
+    data = get_provider().upgrades_downgrades(symbol)
     return data
 
-def get_dividends_and_splits(_stock):
-    # Fetch the stock data using yfinance
+def get_dividends_and_splits(symbol):
+    # Fetch the stock info from the shared fundamentals cache
 
-    info = _stock.info
+    info = get_info(symbol)
 
     dividends_splits_data = {
         "Forward annual dividend rate": info.get("dividendRate"),
@@ -170,9 +231,9 @@ def get_dividends_and_splits(_stock):
     return dividends_splits_data_df
 
 
-def get_dividend_details(_stock):    
-    # Get historical dividend data
-    dividends = _stock.dividends
+def get_dividend_details(symbol):    
+    # Get historical dividend data from the corporate actions store
+    dividends = get_dividends(symbol)
 
     if dividends.empty:
         data = [
@@ -218,9 +279,9 @@ def get_dividend_details(_stock):
     return df
 
 
-def get_valuation_measures(_stock):
-    # Fetch the stock data using yfinance
-    info = _stock.info
+def get_valuation_measures(symbol):
+    # Fetch the stock info from the shared fundamentals cache
+    info = get_info(symbol)
 
     # Extract valuation-related data
     valuation_measures = {
@@ -246,9 +307,9 @@ def get_valuation_measures(_stock):
     return valuation_df
 
 
-def get_financial_highlights(_stock):
-    # Fetch the stock data using yfinance
-    info = _stock.info
+def get_financial_highlights(symbol):
+    # Fetch the stock info from the shared fundamentals cache
+    info = get_info(symbol)
 
     # Extract financial highlights
     financial_highlights = {
@@ -308,8 +369,9 @@ def plot_recommendations(data, numeric_df, max_value):
 
 # @st.cache_data
 
-def fetch_dividends(_stock):
-    data = _stock.get_dividends()
+def fetch_dividends(symbol):
+    # ex-dates from the corporate actions store are tz-naive
+    data = get_dividends(symbol)
 
     # Get the current date
     current_date = datetime.now()
@@ -317,17 +379,10 @@ def fetch_dividends(_stock):
     # Calculate the date 3 years ago
     three_years_ago = pd.Timestamp(current_date - timedelta(days=3 * 365))
 
-    # Ensure three_years_ago is timezone-aware
     if data.empty:
         # If the data is empty, return an empty Series
         return pd.Series(dtype=float)
 
-    # Check if the data index is timezone-aware
-    if data.index.tz is not None:
-        three_years_ago = three_years_ago.tz_localize(data.index.tz)
-    else:
-        three_years_ago = three_years_ago.tz_localize("America/New_York")
-
     # Check the minimum date in the dataset
     min_date = data.index.min()
 
@@ -367,8 +422,8 @@ def plot_stock_data(symbol, period):
     symbol (str): The stock symbol (e.g., 'AAPL' for Apple Inc.).
     period (str): The time period for which to fetch the data (e.g., '1y' for one year).
     """
-    # Fetch the stock data
-    data = yf.Ticker(symbol).history(period=period)
+    # Fetch the stock data from the local bar store
+    data = get_history(symbol, period)
 
     if data.empty:
         print(f"No data found for {symbol} over the period {period}.")